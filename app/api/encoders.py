@@ -0,0 +1,142 @@
+"""Binary encodings of the search results for bulk consumers.
+
+The encoding is negotiated with the Accept header:
+
+- `application/json` (default): the `SearchSuccessResponse` document.
+- `application/msgpack`: the same document in MessagePack, with the ids as
+  16 raw bytes, the dates as days since 1970-01-01 and the times as
+  microseconds since midnight.
+- `application/vnd.apache.arrow.stream`: an Arrow IPC stream with a typed
+  column per field: fixed_size_binary(16), utf8, date32, time64[us] and
+  float64. An empty search is a stream without rows.
+
+The binary encodings are built straight from the result rows, without a
+Pydantic object per event.
+"""
+
+from datetime import date, time
+from functools import cache
+from typing import Sequence
+
+import msgpack
+from fastapi import Response
+
+from app.repositories.base import SUMMARY_FIELDS, EventRow
+from app.schemas.event import ErrorResponse, SearchErrorResponse
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+ACCEPTED_MEDIA_TYPES = {
+    "*/*": JSON,
+    "application/*": JSON,
+    JSON: JSON,
+    MSGPACK: MSGPACK,
+    "application/x-msgpack": MSGPACK,
+    ARROW_STREAM: ARROW_STREAM,
+}
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def negotiate(accept: str | None) -> str:
+    """Preferred media type of the Accept header, JSON if none matches."""
+    best, best_quality = JSON, 0.0
+    for item in (accept or "").split(","):
+        media_range, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        media_type = ACCEPTED_MEDIA_TYPES.get(media_range.lower())
+        # Ties go to the first listed media type
+        if media_type is not None and quality > best_quality:
+            best, best_quality = media_type, quality
+    return best
+
+
+def _days(value: date | None) -> int | None:
+    return None if value is None else value.toordinal() - EPOCH_ORDINAL
+
+
+def _microseconds(value: time | None) -> int | None:
+    if value is None:
+        return None
+    seconds = value.hour * 3600 + value.minute * 60 + value.second
+    return seconds * 1_000_000 + value.microsecond
+
+
+def encode_msgpack(rows: Sequence[EventRow]) -> bytes:
+    """Search response in MessagePack."""
+    if not rows:
+        not_found = SearchErrorResponse(
+            error=ErrorResponse(code="404", message="No events found")
+        )
+        return msgpack.packb(not_found.model_dump())
+    events = [
+        {
+            "id": row.id.bytes,
+            "title": row.title,
+            "start_date": _days(row.start_date),
+            "start_time": _microseconds(row.start_time),
+            "end_date": _days(row.end_date),
+            "end_time": _microseconds(row.end_time),
+            "min_price": row.min_price,
+            "max_price": row.max_price,
+        }
+        for row in rows
+    ]
+    return msgpack.packb({"data": {"events": events}, "error": None})
+
+
+@cache
+def arrow_schema():
+    """Arrow schema of the search results."""
+    # pyarrow is heavy, so it is only imported by the first Arrow request
+    import pyarrow as pa
+
+    types = {
+        "id": pa.binary(16),
+        "title": pa.string(),
+        "start_date": pa.date32(),
+        "start_time": pa.time64("us"),
+        "end_date": pa.date32(),
+        "end_time": pa.time64("us"),
+        "min_price": pa.float64(),
+        "max_price": pa.float64(),
+    }
+    return pa.schema([(field, types[field]) for field in SUMMARY_FIELDS])
+
+
+def encode_arrow(rows: Sequence[EventRow]) -> bytes:
+    """Search results as an Arrow IPC stream of a single record batch."""
+    import pyarrow as pa
+
+    schema = arrow_schema()
+    columns = list(zip(*rows)) or [()] * len(schema)
+    # The ids come first, as in SUMMARY_FIELDS
+    ids = [value.bytes for value in columns[0]]
+    arrays = [pa.array(ids, schema.field(0).type)]
+    for index, values in enumerate(columns[1:], start=1):
+        arrays.append(pa.array(values, schema.field(index).type))
+    batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+ENCODERS = {MSGPACK: encode_msgpack, ARROW_STREAM: encode_arrow}
+
+
+def encode_rows(rows: Sequence[EventRow], media_type: str) -> Response:
+    """Response with the rows in a binary `media_type`."""
+    content = ENCODERS[media_type](rows)
+    headers = {"Vary": "Accept"}
+    return Response(content, media_type=media_type, headers=headers)
@@ -1,11 +1,20 @@
 """API routes for the events."""
 
+import asyncio
 from datetime import datetime
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import PlainTextResponse
 
-from app.dependencies import EventServiceDep, SessionDep
-from app.schemas.event import SearchErrorResponse, SearchSuccessResponse
+from app.core.admission import get_search_admission
+from app.core.cache import get_search_cache
+from app.core.config import get_settings
+from app.core.instrumentation import SamplingProfiler
+from app.core.metrics import render_metrics
+
+from app.dependencies import EventRepositoryDep, EventServiceDep, verify_profiler_token  # isort: skip  # fmt: skip # noqa: E501
+from app.api.encoders import ARROW_STREAM, JSON, MSGPACK, encode_rows, negotiate  # isort: skip  # fmt: skip # noqa: E501
+from app.schemas.event import FacetsSuccessResponse, SearchErrorResponse, SearchOrder, SearchSuccessResponse  # isort: skip  # fmt: skip # noqa: E501
 
 router = APIRouter()
 
@@ -17,21 +26,63 @@ async def healthcheck() -> dict[str, str]:
     return {"status": "OK"}
 
 
+@router.get(
+    "/metrics",
+    include_in_schema=False,
+    response_class=PlainTextResponse,
+)
+async def metrics() -> str:
+    """Expose the metrics of this worker in the Prometheus text format."""
+    return render_metrics()
+
+
+@router.get("/debug/cache", include_in_schema=False)
+async def cache_stats() -> dict[str, int | float | None]:
+    """Hit rate, evictions and bytes in use of the search cache."""
+    return get_search_cache().stats()
+
+
+@router.get(
+    "/debug/profile",
+    include_in_schema=False,
+    response_class=PlainTextResponse,
+    dependencies=[Depends(verify_profiler_token)],
+)
+async def profile(
+    seconds: float = Query(5.0, gt=0, description="Sampling duration"),
+) -> str:
+    """Sample the event loop of this worker, as flamegraph folded stacks."""
+    seconds = min(seconds, get_settings().PROFILER_MAX_SECONDS)
+    # The samples are taken from another thread while the loop serves
+    with SamplingProfiler() as profiler:
+        await asyncio.sleep(seconds)
+    return profiler.folded()
+
+
 @router.get(
     "/search",
     responses={
         200: {
             "description": "List of plans",
             "model": SearchSuccessResponse,
+            "content": {MSGPACK: {}, ARROW_STREAM: {}},
         },
         400: {
             "description": "The request was not correctly formed (missing required parameters, wrong types...)",  # noqa: E501
             "model": SearchErrorResponse,
         },
+        429: {
+            "description": "Too many requests from the client, retry after the Retry-After header",  # noqa: E501
+            "model": SearchErrorResponse,
+        },
         500: {
             "description": "Generic error",
             "model": SearchErrorResponse,
         },
+        503: {
+            "description": "Service overloaded, retry after the Retry-After header",  # noqa: E501
+            "model": SearchErrorResponse,
+        },
     },
     openapi_extra={
         "description": "",
@@ -39,7 +90,9 @@ async def healthcheck() -> dict[str, str]:
     },  # Avoid docstring in FastAPI docs
 )
 async def get_events(
-    session: SessionDep,
+    request: Request,
+    response: Response,
+    repository: EventRepositoryDep,
     event_service: EventServiceDep,
     starts_at: datetime = Query(
         ...,
@@ -51,6 +104,33 @@ async def get_events(
         description="Return only events that finishes before this date",
         example="2021-07-21T17:32:28Z",
     ),
+    min_price: float | None = Query(
+        None,
+        ge=0,
+        description="Return only events with tickets priced at or above this amount",  # noqa: E501
+        example=10.0,
+    ),
+    max_price: float | None = Query(
+        None,
+        ge=0,
+        description="Return only events with tickets priced at or below this amount",  # noqa: E501
+        example=50.0,
+    ),
+    order_by: SearchOrder | None = Query(
+        None,
+        description="Sort events by start date, lowest price or relevance (defaults to relevance when searching by q, start date otherwise)",  # noqa: E501
+    ),
+    q: str | None = Query(
+        None,
+        min_length=1,
+        max_length=200,
+        description="Return only events whose title has words starting with the words of this text",  # noqa: E501
+        example="rock conc",
+    ),
+    include_offline: bool = Query(
+        False,
+        description="Also return events that are no longer listed by the provider",  # noqa: E501
+    ),
 ) -> SearchSuccessResponse | SearchErrorResponse:
     """Search for events within a given date range.
 
@@ -58,10 +138,92 @@ async def get_events(
         event_service: Event service dependency for handling event operations
         starts_at: Start date/time to search from (inclusive)
         ends_at: End date/time to search until (inclusive)
+        min_price: Only events with tickets at or above this price
+        max_price: Only events with tickets at or below this price
+        order_by: Sort events by start date, lowest price or relevance
+        q: Only events whose title has words starting with those of q
+        include_offline: Also events no longer listed in the feed
 
     Returns:
         SearchSuccessResponse containing list of matching events
         SearchErrorResponse containing error details
+        The same events in MessagePack or Arrow IPC, if accepted
+    """
+
+    media_type = negotiate(request.headers.get("accept"))
+    response.headers["Vary"] = "Accept"
+    # Shed the load here, before the search waits for a pool connection
+    client = request.client.host if request.client else None
+    async with get_search_admission().admit(client):
+        if media_type == JSON:
+            return await event_service.search_events(
+                repository,
+                starts_at,
+                ends_at,
+                min_price,
+                max_price,
+                order_by,
+                q,
+                include_offline,
+            )
+        rows = await event_service.search_rows(
+            repository,
+            starts_at,
+            ends_at,
+            min_price,
+            max_price,
+            order_by,
+            q,
+            include_offline,
+        )
+    return encode_rows(rows, media_type)
+
+
+@router.get(
+    "/facets",
+    responses={
+        200: {
+            "description": "Per-day event count and price range",
+            "model": FacetsSuccessResponse,
+        },
+        400: {
+            "description": "The request was not correctly formed (missing required parameters, wrong types...)",  # noqa: E501
+            "model": SearchErrorResponse,
+        },
+        500: {
+            "description": "Generic error",
+            "model": SearchErrorResponse,
+        },
+    },
+    openapi_extra={
+        "description": "",
+        "summary": "Lists the number of events and price range for each day",
+    },  # Avoid docstring in FastAPI docs
+)
+async def get_facets(
+    repository: EventRepositoryDep,
+    event_service: EventServiceDep,
+    starts_at: datetime = Query(
+        ...,
+        description="Aggregate only events that start on or after this date",
+        example="2021-07-01T00:00:00Z",
+    ),
+    ends_at: datetime = Query(
+        ...,
+        description="Aggregate only events that start on or before this date",
+        example="2021-07-31T23:59:59Z",
+    ),
+) -> FacetsSuccessResponse | SearchErrorResponse:
+    """Get per-day facets (count, min and max price) within a date range.
+
+    Args:
+        event_service: Event service dependency for handling event operations
+        starts_at: Start date/time to aggregate from (inclusive)
+        ends_at: End date/time to aggregate until (inclusive)
+
+    Returns:
+        FacetsSuccessResponse containing one facet per day
+        SearchErrorResponse containing error details
     """
 
-    return await event_service.search_events(session, starts_at, ends_at)
+    return await event_service.get_day_facets(repository, starts_at, ends_at)
@@ -0,0 +1,177 @@
+"""Admission control and load shedding of the search requests.
+
+At most SEARCH_MAX_CONCURRENCY searches run at once in a worker, which by
+default is the size of its connection pool, so admitted searches never wait
+for a connection; the in-memory repository has no pool and defaults to
+MEMORY_MAX_CONCURRENCY. Up to SEARCH_MAX_QUEUE more wait for a slot for at
+most SEARCH_QUEUE_TIMEOUT_SECONDS; beyond that requests are rejected at once
+with 503 and Retry-After instead of piling up until the clients time out.
+
+Each client can also be rate limited with a token bucket, rejecting the
+requests over the limit with 429.
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator
+
+from fastapi import HTTPException
+
+from app.core.config import get_settings
+from app.core.metrics import Counter, Gauge
+from app.db.session import get_engine
+
+OVERLOADED = "Service overloaded, retry later"
+RATE_LIMITED = "Too many requests, retry later"
+
+# Status code and message of each rejection reason
+REJECTIONS = {
+    "rate_limited": (429, RATE_LIMITED),
+    "queue_full": (503, OVERLOADED),
+    "queue_timeout": (503, OVERLOADED),
+}
+
+admitted_total = Counter("search_admitted_total", "Search requests admitted")
+rejected_total = Counter(
+    "search_rejected_total", "Search requests rejected by admission control"
+)
+in_flight = Gauge("search_in_flight", "Search requests running")
+queued = Gauge("search_queued", "Search requests waiting for a slot")
+
+# Default concurrency of the searches of the in-memory repository
+MEMORY_MAX_CONCURRENCY = 32
+
+
+class TokenBucket:
+    """Allow `rate` requests per second on average, in bursts of `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token, returning 0 or the seconds until one is available."""
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded wait queue and per-client limits."""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: int,
+        rate_limit: float | None = None,
+        rate_limit_burst: int = 1,
+        max_clients: int = 10000,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.rate_limit = rate_limit
+        self.rate_limit_burst = rate_limit_burst
+        self.max_clients = max_clients
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._running = 0
+        self._waiting = 0
+        # Least recently seen clients are forgotten first
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    @staticmethod
+    def _rejection(reason: str, retry_after: int) -> HTTPException:
+        rejected_total.inc(reason=reason)
+        status_code, detail = REJECTIONS[reason]
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
+        )
+
+    def _check_rate_limit(self, client: str) -> None:
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = TokenBucket(self.rate_limit, self.rate_limit_burst)
+            self._buckets[client] = bucket
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(client)
+        wait = bucket.take()
+        if wait:
+            retry_after = max(1, math.ceil(wait))
+            raise self._rejection("rate_limited", retry_after)
+
+    def _update_gauges(self) -> None:
+        in_flight.set(self._running)
+        queued.set(self._waiting)
+
+    async def _wait_for_slot(self) -> None:
+        if self._waiting >= self.max_queue:
+            raise self._rejection("queue_full", self.retry_after)
+        self._waiting += 1
+        self._update_gauges()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except TimeoutError:
+            rejection = self._rejection("queue_timeout", self.retry_after)
+            raise rejection from None
+        finally:
+            self._waiting -= 1
+            self._update_gauges()
+
+    @asynccontextmanager
+    async def admit(self, client: str | None = None) -> AsyncIterator[None]:
+        """Run the block once admitted, or raise a 429 or 503 error."""
+        if self.rate_limit and client is not None:
+            self._check_rate_limit(client)
+
+        if self._slots.locked():
+            await self._wait_for_slot()
+        else:
+            await self._slots.acquire()  # Returns at once on a free slot
+
+        admitted_total.inc()
+        self._running += 1
+        self._update_gauges()
+        try:
+            yield
+        finally:
+            self._running -= 1
+            self._update_gauges()
+            self._slots.release()
+
+
+@lru_cache
+def get_search_admission() -> AdmissionController:
+    """Admission controller of the searches of this worker."""
+    settings = get_settings()
+    if settings.SEARCH_MAX_CONCURRENCY:
+        max_concurrency = settings.SEARCH_MAX_CONCURRENCY
+    elif settings.EVENT_REPOSITORY == "memory":
+        max_concurrency = MEMORY_MAX_CONCURRENCY  # Without a database
+    else:
+        max_concurrency = get_engine().pool.size()
+    return AdmissionController(
+        max_concurrency=max_concurrency,
+        max_queue=settings.SEARCH_MAX_QUEUE,
+        queue_timeout=settings.SEARCH_QUEUE_TIMEOUT_SECONDS,
+        retry_after=settings.SEARCH_RETRY_AFTER_SECONDS,
+        rate_limit=settings.SEARCH_RATE_LIMIT_PER_SECOND,
+        rate_limit_burst=settings.SEARCH_RATE_LIMIT_BURST,
+    )
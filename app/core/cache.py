@@ -0,0 +1,159 @@
+"""Worker-local read-through cache of the search results.
+
+Deployments without a shared cache close to the API still avoid repeating
+searches: each worker keeps the result rows of its recent searches, keyed by
+the normalized query, so requests for other times of the same days share an
+entry. Empty results are cached as well, so scanners of empty ranges cost a
+dictionary lookup.
+
+The least recently used entries are evicted once the serialized size of all
+the entries exceeds SEARCH_CACHE_MAX_BYTES, and entries expire after
+SEARCH_CACHE_TTL_SECONDS. The cache subscribes to the ingest listener: an
+ingest notification only evicts the entries whose date range overlaps the
+dates the ingest touched. When notifications were missed, which shows as a
+gap in the dataset versions, every entry is dropped instead.
+"""
+
+import pickle
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Sequence
+
+from app.core.config import get_settings
+from app.repositories.base import EventQuery, EventRow
+
+from app.db.notifications import IngestNotification, ingest_listener  # isort: skip  # fmt: skip # noqa: E501
+
+
+@dataclass(slots=True)
+class _Entry:
+    rows: tuple[EventRow, ...]
+    size: int
+    expires_at: float
+
+
+def serialized_size(rows: Sequence[EventRow]) -> int:
+    """Bytes of the rows once serialized."""
+    return len(pickle.dumps(tuple(rows), pickle.HIGHEST_PROTOCOL))
+
+
+class SearchCache:
+    """LRU cache of search rows, bounded by their serialized size."""
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        # Dataset version of the last ingest notification applied
+        self.version: int | None = None
+        self._entries: OrderedDict[EventQuery, _Entry] = OrderedDict()
+        self.bytes_in_use = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, query: EventQuery) -> None:
+        self.bytes_in_use -= self._entries.pop(query).size
+
+    def get(self, query: EventQuery) -> tuple[EventRow, ...] | None:
+        """Cached rows of a query, None if they are missing or expired."""
+        entry = self._entries.get(query)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            self._remove(query)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(query)
+        self.hits += 1
+        return entry.rows
+
+    def put(
+        self,
+        query: EventQuery,
+        rows: Sequence[EventRow],
+        version: int | None,
+    ) -> None:
+        """Cache the rows of a query searched under a dataset version.
+
+        The version must be read before the search, so that rows racing an
+        ingest notification are not cached after it.
+        """
+        if version != self.version:
+            return
+        rows = tuple(rows)
+        size = serialized_size(rows)
+        if size > self.max_bytes:
+            return
+        if query in self._entries:
+            self._remove(query)
+        expires_at = time.monotonic() + self.ttl
+        self._entries[query] = _Entry(rows, size, expires_at)
+        self.bytes_in_use += size
+        while self.bytes_in_use > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def on_ingest(self, notification: IngestNotification) -> None:
+        """Evict the entries an ingest may have changed.
+
+        Only the queries whose start date range overlaps the touched dates
+        are evicted. Without the previous version, or after a gap in the
+        versions, the changes of the missed ingests are unknown.
+        """
+        if self.version is not None and notification.version <= self.version:
+            return
+        if self.version is None or notification.version > self.version + 1:
+            self.invalidations += len(self._entries)
+            self.clear()
+        else:
+            stale = [
+                query
+                for query in self._entries
+                if query.starts_on <= notification.ends_on
+                and notification.starts_on <= query.ends_on
+            ]
+            for query in stale:
+                self._remove(query)
+            self.invalidations += len(stale)
+        self.version = notification.version
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        self._entries.clear()
+        self.bytes_in_use = 0
+
+    def stats(self) -> dict[str, int | float | None]:
+        """Hit rate, evictions and size of the cache."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes_in_use": self.bytes_in_use,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "dataset_version": self.version,
+        }
+
+
+@lru_cache
+def get_search_cache() -> SearchCache:
+    """Search cache of this worker, kept fresh by the ingest listener."""
+    settings = get_settings()
+    cache = SearchCache(
+        max_bytes=settings.SEARCH_CACHE_MAX_BYTES,
+        ttl=settings.SEARCH_CACHE_TTL_SECONDS,
+    )
+    ingest_listener.subscribe(cache.on_ingest)
+    return cache
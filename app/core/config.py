@@ -1,5 +1,8 @@
 """Configuration for the application."""
 
+from functools import lru_cache
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
 
@@ -15,10 +18,55 @@ class Settings(BaseSettings):
     CELERY_RESULT_BACKEND: str
     EXTERNAL_API_URL: str
     CELERY_FETCH_EVENTS_SCHEDULE: float
+    SEARCH_TEXT_LIMIT: int = 100
+    SEARCH_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # Per worker, 0 disables
+    SEARCH_CACHE_TTL_SECONDS: float = 60.0
+    EVENT_REPOSITORY: Literal["postgres", "memory"] = "postgres"
+    EVENT_SNAPSHOT_PATH: str | None = None  # Feed loaded by the memory one
+    PARSE_PARALLEL_THRESHOLD_BYTES: int = 32 * 1024 * 1024
+    PARSE_WORKERS: int | None = None  # Defaults to the number of cores
+    INGEST_SPOOL_DIR: str = "/tmp/ingest"
+    INGEST_BATCH_SIZE: int = 500  # Initial size, adapted to the latency
+    INGEST_BATCH_MIN_SIZE: int = 50
+    INGEST_BATCH_MAX_SIZE: int = 5000
+    INGEST_BATCH_TARGET_SECONDS: float = 0.25
+    INGEST_LISTENER_RETRY_SECONDS: float = 5.0
+    DOWNLOAD_CONNECT_TIMEOUT_SECONDS: float = 10.0
+    DOWNLOAD_READ_TIMEOUT_SECONDS: float = 60.0  # Between two chunks
+    DOWNLOAD_ATTEMPTS: int = 3  # Resumed from the spool within a task run
+    INGEST_ANALYZE_THRESHOLD: int = 10000  # Events written to run ANALYZE
+    CELERY_PLAN_SAMPLE_SCHEDULE: float = 900.0
+    PLAN_SAMPLE_WINDOW_DAYS: int = 30  # Date range of the sampled searches
+    PLAN_SAMPLE_RETENTION_DAYS: int = 30
+    PLAN_BUFFER_REGRESSION_RATIO: float = 2.0  # Over the previous sample
+    PLAN_BUFFER_REGRESSION_MIN_BLOCKS: int = 100  # Ignored below
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    WEB_CONCURRENCY: int | None = None  # Defaults to the number of cores
+    WORKER_MAX_REQUESTS: int = 10000  # Recycle a worker after this many
+    WORKER_MAX_REQUESTS_JITTER: int = 1000
+    WORKER_GRACEFUL_TIMEOUT: float = 30.0
+    DB_CONNECTION_BUDGET: int = 80  # Across the API workers of a host
+    DB_POOL_MAX_SIZE: int = 20
+    SEARCH_MAX_CONCURRENCY: int | None = None  # Defaults to the pool size
+    SEARCH_MAX_QUEUE: int = 64
+    SEARCH_QUEUE_TIMEOUT_SECONDS: float = 1.0
+    SEARCH_RETRY_AFTER_SECONDS: int = 1
+    SEARCH_RATE_LIMIT_PER_SECOND: float | None = None  # Per client, or none
+    SEARCH_RATE_LIMIT_BURST: int = 20
+    LOOP_LAG_INTERVAL_SECONDS: float = 0.25
+    LOOP_LAG_THRESHOLD_SECONDS: float = 0.1  # Lag logged with a stack above
+    PROFILER_TOKEN: str | None = None  # The profile endpoint is off without
+    PROFILER_INTERVAL_SECONDS: float = 0.005
+    PROFILER_MAX_SECONDS: float = 30.0
+    INGEST_PROFILE: bool = False  # Write a profile of each ingest run
 
     class Config:
         env_file = ".env"
         extra = "allow"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Load the settings on first use, so importing the app has no I/O."""
+    return Settings()
@@ -0,0 +1,164 @@
+"""Event loop lag monitoring and sampling profiling of a live process.
+
+`LoopLagMonitor` measures how late a heartbeat on the event loop wakes up.
+A watchdog thread logs the stack of the loop thread while the loop is
+blocked, so the blocking code shows up in the logs and not only its delay.
+
+`SamplingProfiler` samples the stack of a thread at a fixed interval and
+renders the samples as folded stacks, the input of flamegraph.pl and of
+speedscope.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as Tally
+from types import FrameType
+
+from app.core.config import get_settings
+from app.core.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+loop_lag = Gauge("event_loop_lag_seconds", "Delay of the last heartbeat")
+loop_stalls_total = Counter(
+    "event_loop_stalls_total", "Heartbeats delayed over the lag threshold"
+)
+
+
+class LoopLagMonitor:
+    """Measure the lag of the running event loop.
+
+    Start it from the loop to monitor, e.g. `async with LoopLagMonitor():`.
+    """
+
+    def __init__(
+        self,
+        name: str = "api",
+        interval: float | None = None,
+        threshold: float | None = None,
+    ):
+        settings = get_settings()
+        self.name = name
+        self.interval = interval or settings.LOOP_LAG_INTERVAL_SECONDS
+        self.threshold = threshold or settings.LOOP_LAG_THRESHOLD_SECONDS
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._loop_thread_id: int | None = None
+        self._beat = time.monotonic()
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(
+            target=self._watch, name=f"{self.name}-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog.join()
+
+    async def __aenter__(self) -> "LoopLagMonitor":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            started_at = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+            lag = self._beat - started_at - self.interval
+            loop_lag.set(lag, loop=self.name)
+            if lag > self.threshold:
+                loop_stalls_total.inc(loop=self.name)
+                lag_ms = f"{lag * 1000:.0f} ms"
+                logger.warning(f"Event loop {self.name} lagged {lag_ms}")
+
+    def _watch(self) -> None:
+        reported_beat = None
+        while not self._stopped.wait(self.interval):
+            beat = self._beat
+            late = time.monotonic() - beat - self.interval
+            if late <= self.threshold or beat == reported_beat:
+                continue
+            reported_beat = beat  # Once per stall
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                stack = "".join(traceback.format_stack(frame))
+                logger.warning(
+                    f"Event loop {self.name} blocked for {late * 1000:.0f} ms"
+                    f" in:\n{stack}"
+                )
+
+
+class SamplingProfiler:
+    """Sample the stack of a thread, the calling one by default."""
+
+    def __init__(
+        self,
+        interval: float | None = None,
+        thread_id: int | None = None,
+    ):
+        self.interval = interval or get_settings().PROFILER_INTERVAL_SECONDS
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Tally[str] = Tally()
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._sampler = threading.Thread(
+            target=self._sample, name="sampling-profiler", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._sampler.join()
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @staticmethod
+    def _fold(frame: FrameType) -> str:
+        names = []
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "?")
+            names.append(f"{module}:{frame.f_code.co_name}")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.samples[self._fold(frame)] += 1
+
+    def folded(self) -> str:
+        """Samples as folded stacks, one `frame;frame count` per line."""
+        samples = self.samples.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in samples)
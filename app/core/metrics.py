@@ -0,0 +1,53 @@
+"""Minimal in-process metrics, rendered in the Prometheus text format.
+
+Every worker process keeps its own values, so a scrape reads one worker.
+"""
+
+from collections import defaultdict
+
+registry: list["Metric"] = []
+
+
+class Metric:
+    """Values of a metric, one per set of labels."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._values: dict[tuple, float] = defaultdict(float)
+        registry.append(self)
+
+    def value(self, **labels: str) -> float:
+        return self._values[tuple(sorted(labels.items()))]
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        for labels, value in sorted(self._values.items()):
+            pairs = ",".join(f'{name}="{label}"' for name, label in labels)
+            suffix = f"{{{pairs}}}" if pairs else ""
+            lines.append(f"{self.name}{suffix} {value:g}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        self._values[tuple(sorted(labels.items()))] += amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[tuple(sorted(labels.items()))] = value
+
+
+def render_metrics() -> str:
+    """All the metrics of the process in the Prometheus text format."""
+    return "\n".join(metric.render() for metric in registry) + "\n"
@@ -0,0 +1,156 @@
+"""Push notifications of ingest completions through Postgres LISTEN/NOTIFY.
+
+The ingest task notifies `CHANNEL` once a run is committed, with a new
+dataset version and the span of dates it touched. Every API worker keeps a
+background LISTEN connection and hands the notifications to its subscribers,
+so in-process data can be refreshed as soon as new data lands.
+"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Awaitable, Callable
+
+import asyncpg
+from sqlalchemy import Sequence, func, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import Base
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "events_ingested"
+
+# Monotonic dataset version, bumped by every committed ingest run
+dataset_version_seq = Sequence("dataset_version_seq", metadata=Base.metadata)
+
+
+@dataclass(frozen=True)
+class IngestNotification:
+    """New dataset version and the dates touched by the ingest run."""
+
+    version: int
+    starts_on: date
+    ends_on: date
+
+    def to_payload(self) -> str:
+        return json.dumps(
+            {
+                "version": self.version,
+                "starts_on": self.starts_on.isoformat(),
+                "ends_on": self.ends_on.isoformat(),
+            }
+        )
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "IngestNotification":
+        data = json.loads(payload)
+        return cls(
+            version=data["version"],
+            starts_on=date.fromisoformat(data["starts_on"]),
+            ends_on=date.fromisoformat(data["ends_on"]),
+        )
+
+
+async def notify_ingest(
+    session: AsyncSession, starts_on: date, ends_on: date
+) -> IngestNotification:
+    """Bump the dataset version and notify the listeners on commit."""
+    version = await session.scalar(select(dataset_version_seq.next_value()))
+    notification = IngestNotification(version, starts_on, ends_on)
+    payload = notification.to_payload()
+    await session.execute(select(func.pg_notify(CHANNEL, payload)))
+    await session.commit()  # Notifications are only delivered on commit
+    return notification
+
+
+Subscriber = Callable[[IngestNotification], Awaitable[None] | None]
+
+
+class IngestListener:
+    """Background LISTEN connection of an API worker.
+
+    The connection lives outside the engine pool and is re-established
+    after a failure. Notifications older than the last seen dataset
+    version are dropped.
+    """
+
+    def __init__(self, database_url: str | None = None):
+        self._database_url = database_url
+        self._subscribers: list[Subscriber] = []
+        self._task: asyncio.Task | None = None
+        self._pending: set[asyncio.Task] = set()
+        self.listening = asyncio.Event()
+        self.version: int | None = None
+
+    def subscribe(self, subscriber: Subscriber) -> None:
+        """Call `subscriber` with every new notification."""
+        self._subscribers.append(subscriber)
+
+    async def start(self) -> None:
+        """Start listening in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        """Stop listening and close the connection."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _dsn(self) -> str:
+        # asyncpg takes a plain postgresql:// URL
+        url = make_url(self._database_url or get_settings().DATABASE_URL)
+        url = url.set(drivername="postgresql")
+        return url.render_as_string(hide_password=False)
+
+    async def _listen(self) -> None:
+        retry_seconds = get_settings().INGEST_LISTENER_RETRY_SECONDS
+        while True:
+            try:
+                connection = await asyncpg.connect(self._dsn())
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.error(f"Cannot connect to listen for ingests: {exc}")
+                await asyncio.sleep(retry_seconds)
+                continue
+
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _: closed.set())
+            try:
+                await connection.add_listener(CHANNEL, self._on_notification)
+                self.listening.set()
+                logger.info(f"Listening for ingests on {CHANNEL}.")
+                await closed.wait()
+                logger.warning("Ingest listener connection lost.")
+            finally:
+                self.listening.clear()
+                if not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(retry_seconds)
+
+    def _on_notification(self, _connection, _pid, _channel, payload):
+        try:
+            notification = IngestNotification.from_payload(payload)
+        except (ValueError, KeyError) as exc:
+            logger.error(f"Invalid ingest notification {payload!r}: {exc}")
+            return
+        if self.version is not None and notification.version <= self.version:
+            return
+        self.version = notification.version
+        for subscriber in self._subscribers:
+            result = subscriber(notification)
+            if asyncio.iscoroutine(result):
+                task = asyncio.create_task(result)
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+
+
+ingest_listener = IngestListener()
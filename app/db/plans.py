@@ -0,0 +1,171 @@
+"""Sampling of the search plans, to catch planner regressions.
+
+Whether a search is fast depends on the planner picking the search indexes,
+and a big ingest can flip it to a sequential scan until `events` is analyzed
+again. Every search variant is therefore run under EXPLAIN (ANALYZE,
+BUFFERS) on a schedule, and the plans are kept in `search_plan_samples`. A
+sample is flagged when its shape (node types and scanned indexes) differs
+from the previous sample of its variant, or when it touches many more
+buffers.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import Select, delete, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import get_settings
+from app.models.plan_sample import SearchPlanSample
+from app.repositories.postgres import build_search_statement
+from app.services.events_service import EventService
+
+logger = logging.getLogger(__name__)
+
+# Parameters of the sampled searches, on top of their date range
+SEARCH_VARIANTS = {
+    "date range": {},
+    "date range + price": {"min_price": 20.0, "max_price": 60.0},
+    "date range by price": {"order_by": "price"},
+    "date range + title prefix": {"q": "rock"},
+    "date range with offline events": {"include_offline": True},
+}
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (ANALYZE, BUFFERS) of a statement, keeping its parameters."""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    return "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + compiler.process(
+        element.statement, **kw
+    )
+
+
+def iter_plan_nodes(plan: dict):
+    """Yield every node of an EXPLAIN (FORMAT JSON) plan tree."""
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from iter_plan_nodes(child)
+
+
+def plan_shape(plan: dict) -> str:
+    """Node types and what they scan, without the costs and row counts."""
+    shape = plan["Node Type"]
+    if "Index Name" in plan:
+        shape += f" using {plan['Index Name']}"
+    elif "Relation Name" in plan:
+        shape += f" on {plan['Relation Name']}"
+    children = [plan_shape(child) for child in plan.get("Plans", [])]
+    if children:
+        shape += f" ({', '.join(children)})"
+    return shape
+
+
+def search_statements(
+    starts_at: datetime,
+    ends_at: datetime,
+) -> dict[str, Select]:
+    """The search statement of every variant over a date range."""
+    return {
+        variant: build_search_statement(
+            EventService.build_query(starts_at, ends_at, **params)
+        )
+        for variant, params in SEARCH_VARIANTS.items()
+    }
+
+
+async def explain(
+    connection: AsyncConnection | AsyncSession, statement: Select
+) -> dict:
+    """Run EXPLAIN (ANALYZE, BUFFERS) and return the top plan."""
+    result = await connection.execute(Explain(statement))
+    return result.scalar_one()[0]
+
+
+def _buffers(sample: SearchPlanSample) -> int:
+    return sample.shared_hit_blocks + sample.shared_read_blocks
+
+
+def _buffers_regressed(
+    previous: SearchPlanSample,
+    sample: SearchPlanSample,
+) -> bool:
+    settings = get_settings()
+    if _buffers(sample) < settings.PLAN_BUFFER_REGRESSION_MIN_BLOCKS:
+        return False
+    ratio = settings.PLAN_BUFFER_REGRESSION_RATIO
+    return _buffers(sample) > _buffers(previous) * ratio
+
+
+async def sample_search_plans(session: AsyncSession) -> list[SearchPlanSample]:
+    """Explain every search variant and store a sample of each.
+
+    Every sample is kept; its flags only mark a changed shape or a buffer
+    regression against the previous sample of the variant. The searches
+    cover the next PLAN_SAMPLE_WINDOW_DAYS, the common case. Samples older
+    than PLAN_SAMPLE_RETENTION_DAYS are dropped.
+    """
+    settings = get_settings()
+    starts_at = datetime.now(timezone.utc)
+    ends_at = starts_at + timedelta(days=settings.PLAN_SAMPLE_WINDOW_DAYS)
+
+    samples = []
+    statements = search_statements(starts_at, ends_at)
+    for variant, statement in statements.items():
+        explained = await explain(session, statement)
+        plan = explained["Plan"]
+        previous = await session.scalar(
+            select(SearchPlanSample)
+            .where(SearchPlanSample.variant == variant)
+            .order_by(SearchPlanSample.id.desc())
+            .limit(1)
+        )
+        sample = SearchPlanSample(
+            variant=variant,
+            shape=plan_shape(plan),
+            plan=explained,
+            execution_ms=explained["Execution Time"],
+            shared_hit_blocks=plan["Shared Hit Blocks"],
+            shared_read_blocks=plan["Shared Read Blocks"],
+            shape_changed=False,
+            buffers_regressed=False,
+        )
+        if previous is not None:
+            sample.shape_changed = sample.shape != previous.shape
+            sample.buffers_regressed = _buffers_regressed(previous, sample)
+        if sample.shape_changed:
+            logger.warning(
+                f"Plan of search {variant!r} changed from "
+                f"{previous.shape} to {sample.shape}"
+            )
+        if sample.buffers_regressed:
+            logger.warning(
+                f"Search {variant!r} touched {_buffers(sample)} buffers, "
+                f"up from {_buffers(previous)}"
+            )
+        session.add(sample)
+        samples.append(sample)
+
+    retention = timedelta(days=settings.PLAN_SAMPLE_RETENTION_DAYS)
+    await session.execute(
+        delete(SearchPlanSample).where(
+            SearchPlanSample.captured_at < starts_at - retention
+        )
+    )
+    await session.commit()
+    return samples
+
+
+async def analyze_events(session: AsyncSession) -> None:
+    """Refresh the planner statistics of `events` without autovacuum."""
+    await session.execute(text("ANALYZE events"))
+    await session.commit()
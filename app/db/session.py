@@ -1,25 +1,68 @@
 """Database session."""
 
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
-
-from app.core.config import settings
+import asyncio
+from functools import lru_cache
 
-# Forcing asyncpg driver by ensuring +asyncpg is in the URL
-database_url = str(settings.DATABASE_URL)
+from sqlalchemy import Executable
+from sqlalchemy.orm import DeclarativeBase
 
-engine = create_async_engine(database_url)
+from app.core.config import get_settings
 
-async_session_maker = async_sessionmaker(
-    engine,
-    expire_on_commit=False,
-)
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine  # isort: skip  # fmt: skip # noqa: E501
 
 
 class Base(DeclarativeBase):
     pass
 
 
-async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+def worker_pool_size(connection_budget: int, workers: int, cap: int) -> int:
+    """Pool size of each API worker so that all of them fit in the budget.
+
+    A rolling reload runs one extra worker while it replaces each of them,
+    and every worker also holds the LISTEN connection of the ingest
+    listener outside of its pool.
+    """
+    return max(1, min(cap, connection_budget // (workers + 1) - 1))
+
+
+@lru_cache
+def get_engine() -> AsyncEngine:
+    """Create the engine of the process on first use."""
+    settings = get_settings()
+    # Forcing asyncpg driver by ensuring +asyncpg is in the URL
+    database_url = str(settings.DATABASE_URL)
+    pool_size = worker_pool_size(
+        settings.DB_CONNECTION_BUDGET,
+        settings.WEB_CONCURRENCY or 1,
+        settings.DB_POOL_MAX_SIZE,
+    )
+    return create_async_engine(
+        database_url,
+        pool_size=pool_size,
+        max_overflow=0,  # The pool size is the hard cap of the worker
+    )
+
+
+@lru_cache
+def get_session_maker() -> async_sessionmaker:
+    """Session factory bound to the engine of the process."""
+    return async_sessionmaker(get_engine(), expire_on_commit=False)
+
+
+async def warm_up(engine: AsyncEngine, statement: Executable) -> None:
+    """Open every pool connection and prepare `statement` on each of them.
+
+    asyncpg prepares statements per connection, so executing `statement`
+    once on each pooled connection takes the connect, the dialect setup and
+    the statement preparation off the first requests.
+    """
+    size = engine.pool.size()
+    # Hold each connection until all are open, so none is checked out twice
+    opened = asyncio.Barrier(size)
+
+    async def prepare() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(statement)
+            await opened.wait()
+
+    await asyncio.gather(*(prepare() for _ in range(size)))
@@ -1,18 +1,38 @@
 """Dependency injectors for the application."""
 
+import secrets
 from typing import Annotated, AsyncGenerator
 
-from fastapi import Depends
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import Depends, Header, HTTPException
 
-from app.db.session import async_session_maker
+from app.core.config import get_settings
+from app.db.session import get_session_maker
+from app.repositories.base import EventRepository
+from app.repositories.memory import get_memory_repository
+from app.repositories.postgres import PostgresEventRepository
 from app.services.events_service import EventService
 
 
-async def get_db() -> AsyncGenerator[AsyncSession, None]:
-    async with async_session_maker() as session:
-        yield session
+async def get_event_repository() -> AsyncGenerator[EventRepository, None]:
+    if get_settings().EVENT_REPOSITORY == "memory":
+        yield get_memory_repository()
+        return
+    async with get_session_maker()() as session:
+        yield PostgresEventRepository(session)
 
 
-SessionDep = Annotated[AsyncSession, Depends(get_db)]
+def verify_profiler_token(
+    x_profiler_token: Annotated[str | None, Header()] = None,
+) -> None:
+    """Allow the profiler to the holders of PROFILER_TOKEN, if it is set."""
+    expected = get_settings().PROFILER_TOKEN
+    if expected is None:
+        raise HTTPException(status_code=404, detail="Profiler disabled")
+    if x_profiler_token is None or not secrets.compare_digest(
+        x_profiler_token, expected
+    ):
+        raise HTTPException(status_code=403, detail="Invalid profiler token")
+
+
+EventRepositoryDep = Annotated[EventRepository, Depends(get_event_repository)]
 EventServiceDep = Annotated[EventService, Depends(EventService)]
@@ -6,6 +6,9 @@ from fastapi.responses import JSONResponse
 
 from app.schemas.event import ErrorResponse, SearchErrorResponse
 
+# Statuses the clients act upon: authenticate, or back off and retry
+KEPT_STATUS_CODES = (401, 403, 404, 429, 503)
+
 
 async def search_exception_handler(
     _: Request, exception: HTTPException
@@ -27,5 +30,11 @@ async def search_exception_handler(
             ),
         )
         status_code = 500
+        if exception.status_code in KEPT_STATUS_CODES:
+            status_code = exception.status_code
 
-    return JSONResponse(status_code=status_code, content=response.model_dump())
+    return JSONResponse(
+        status_code=status_code,
+        content=response.model_dump(),
+        headers=getattr(exception, "headers", None),
+    )
@@ -1,15 +1,27 @@
 """Main application."""
 
+import logging
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
 
 from fastapi import FastAPI, HTTPException
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.routes import router
+from app.core.config import get_settings
+from app.core.instrumentation import LoopLagMonitor
 from app.core.security import CORS_CONFIG
-from app.db.session import create_tables
+from app.db.notifications import ingest_listener
+from app.db.session import get_engine, warm_up
 from app.exceptions.handler import search_exception_handler
+from app.repositories.base import EventQuery
+from app.repositories.memory import get_memory_repository
+from app.repositories.postgres import build_search_statement
+from app.tasks.feed_parser import parse_feed
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="blazing-microservice")
 
@@ -17,10 +29,34 @@ app = FastAPI(title="blazing-microservice")
 app.add_middleware(CORSMiddleware, **CORS_CONFIG)
 
 
+async def load_snapshot(path: str) -> None:
+    """Load a feed snapshot into the in-memory repository."""
+    events = await parse_feed(Path(path).read_bytes())
+    await get_memory_repository().upsert(events)
+    logger.info(f"Loaded {len(events)} events from {path}.")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    await create_tables()
-    yield
+    settings = get_settings()
+    if settings.EVENT_REPOSITORY == "memory":
+        # Read-only, without a database
+        if settings.EVENT_SNAPSHOT_PATH:
+            await load_snapshot(settings.EVENT_SNAPSHOT_PATH)
+        async with LoopLagMonitor():
+            yield
+        return
+
+    # The schema is migrated out-of-band (alembic upgrade head), so startup
+    # only warms the pool up before uvicorn starts accepting requests
+    today = datetime.now(timezone.utc).date()
+    statement = build_search_statement(EventQuery(today, today))
+    await warm_up(get_engine(), statement)
+    await ingest_listener.start()
+    async with LoopLagMonitor():
+        yield
+    await ingest_listener.stop()
+    await get_engine().dispose()
 
 
 app.router.lifespan_context = lifespan
@@ -3,11 +3,16 @@
 from datetime import date, time
 from uuid import UUID, uuid4
 
-from sqlalchemy import Date, Float, Index, String, Time
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.db.session import Base
 
+from sqlalchemy import BigInteger, Computed, Date, Float, Index, Integer, String, Time, literal_column, text  # isort: skip  # fmt: skip # noqa: E501
+
+ONLINE = "online"  # Listed in the feed by the latest ingest run
+OFFLINE = "offline"  # Dropped from the feed since, kept as history
+
 
 class Event(Base):
     """Event model."""
@@ -15,7 +20,27 @@ class Event(Base):
     __tablename__ = "events"
 
     __table_args__ = (
+        # All the events, for the searches including the offline ones
         Index("idx_date_range", "start_date", "end_date"),
+        # Date range plus both prices, so price filters are resolved in the
+        # index and the remaining columns are included for index-only scans.
+        # Only the online events, so the index does not grow with history
+        Index(
+            "idx_date_range_price",
+            "start_date",
+            "end_date",
+            "min_price",
+            "max_price",
+            postgresql_include=["id", "title", "start_time", "end_time"],
+            postgresql_where=text(f"status = '{ONLINE}'"),
+        ),
+        # Online events by generation, for the sweep of the stale ones
+        Index(
+            "idx_online_generation",
+            "sync_generation",
+            postgresql_where=text(f"status = '{ONLINE}'"),
+        ),
+        Index("idx_title_search", "title_search", postgresql_using="gin"),
         Index(
             "idx_provider_ids",
             "provider_unique_id",
@@ -39,3 +64,35 @@ class Event(Base):
     end_time: Mapped[time | None] = mapped_column(Time, nullable=True)
     min_price: Mapped[float | None] = mapped_column(Float, nullable=True)
     max_price: Mapped[float | None] = mapped_column(Float, nullable=True)
+    # Maintained by Postgres from the title, only read by the text search
+    title_search: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(title, ''))", persisted=True),
+        deferred=True,
+    )
+    # Ingest run that last saw the event in the feed
+    sync_generation: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        server_default="0",
+    )
+    status: Mapped[str] = mapped_column(
+        String,
+        nullable=False,
+        server_default=ONLINE,
+    )
+
+
+# Inlined rather than bound, so prepared statements match the partial indexes
+ONLINE_ONLY = Event.status == literal_column(f"'{ONLINE}'")
+
+
+class EventDaySummary(Base):
+    """Per-day aggregate of the events starting on that day."""
+
+    __tablename__ = "event_day_summaries"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    event_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    min_price: Mapped[float | None] = mapped_column(Float, nullable=True)
+    max_price: Mapped[float | None] = mapped_column(Float, nullable=True)
@@ -0,0 +1,39 @@
+"""Models for the ingest runs."""
+
+from datetime import datetime
+
+from sqlalchemy import BigInteger, DateTime, Integer, Sequence, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+# Generation stamped on the events seen by each ingest run
+sync_generation_seq = Sequence("sync_generation_seq", metadata=Base.metadata)
+
+
+class IngestRun(Base):
+    """Checkpoint of an ingest run that has not completed yet."""
+
+    __tablename__ = "ingest_runs"
+
+    run_id: Mapped[str] = mapped_column(String, primary_key=True)
+    # Number of parsed events already committed, where a retry resumes from
+    next_offset: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+    )
+    # SHA-256 of the payload the offset counts events of
+    payload_digest: Mapped[str | None] = mapped_column(String, nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+        onupdate=func.now(),
+    )
+    # Kept across retries, so the events upserted by every attempt match
+    sync_generation: Mapped[int] = mapped_column(
+        BigInteger,
+        nullable=False,
+        server_default=sync_generation_seq.next_value(),
+    )
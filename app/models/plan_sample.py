@@ -0,0 +1,41 @@
+"""Models for the sampled query plans."""
+
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.session import Base
+
+from sqlalchemy import BigInteger, Boolean, DateTime, Float, Identity, Index, Integer, String, func  # isort: skip  # fmt: skip # noqa: E501
+
+
+class SearchPlanSample(Base):
+    """EXPLAIN (ANALYZE, BUFFERS) of a search variant at some point."""
+
+    __tablename__ = "search_plan_samples"
+
+    __table_args__ = (
+        Index(
+            "idx_plan_samples_variant",
+            "variant",
+            "captured_at",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    variant: Mapped[str] = mapped_column(String, nullable=False)
+    captured_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+    # Node types and scanned indexes, without the costs and row counts
+    shape: Mapped[str] = mapped_column(String, nullable=False)
+    plan: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    execution_ms: Mapped[float] = mapped_column(Float, nullable=False)
+    shared_hit_blocks: Mapped[int] = mapped_column(Integer, nullable=False)
+    shared_read_blocks: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Compared to the previous sample of the variant
+    shape_changed: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    buffers_regressed: Mapped[bool] = mapped_column(Boolean, nullable=False)
@@ -0,0 +1,103 @@
+"""Interface of the event storage backends."""
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import date, time
+from typing import Mapping, NamedTuple, Sequence
+from uuid import UUID
+
+from app.schemas.event import SearchOrder
+
+
+class EventRow(NamedTuple):
+    """Search result, with the fields of EventSummary in order."""
+
+    id: UUID
+    title: str
+    start_date: date
+    start_time: time | None
+    end_date: date | None
+    end_time: time | None
+    min_price: float | None
+    max_price: float | None
+
+
+SUMMARY_FIELDS = EventRow._fields
+
+
+class DaySummary(NamedTuple):
+    """Aggregate of the online events starting on a day."""
+
+    day: date
+    event_count: int
+    min_price: float | None
+    max_price: float | None
+
+
+@dataclass(frozen=True)
+class EventQuery:
+    """Validated search criteria.
+
+    An event matches when it starts on or after `starts_on` and both starts
+    and ends on or before `ends_on`, when any of its tickets falls in the
+    price range, and when every word of `words` is a prefix of a word of
+    its title. Only online events match unless `include_offline` is set.
+    """
+
+    starts_on: date
+    ends_on: date
+    min_price: float | None = None
+    max_price: float | None = None
+    order_by: SearchOrder | None = None
+    words: tuple[str, ...] = ()
+    include_offline: bool = False
+    limit: int | None = None
+
+
+def deduplicate_events(events: list[dict]) -> list[dict]:
+    """Keep a single event per provider_unique_id, the last one wins.
+
+    ON CONFLICT DO UPDATE fails when a statement touches the same row twice,
+    which happens when the feed repeats an event.
+    """
+    unique_events = {event["provider_unique_id"]: event for event in events}
+    if len(unique_events) == len(events):
+        return events
+    return list(unique_events.values())
+
+
+class EventRepository(ABC):
+    """Reads and upserts of the events.
+
+    Search results are rows with the attributes, order and `_asdict()` of
+    `EventRow`, so they can be validated or encoded without a copy.
+    """
+
+    @abstractmethod
+    async def search(self, query: EventQuery) -> Sequence[EventRow]:
+        """Events matching the query, sorted as requested.
+
+        By start date by default, by lowest price with `price`, and by
+        relevance then start date when searching by words.
+        """
+
+    @abstractmethod
+    async def day_summaries(
+        self, starts_on: date, ends_on: date
+    ) -> Sequence[DaySummary]:
+        """Per-day summaries of the days in the range, by day."""
+
+    @abstractmethod
+    async def upsert(self, events: list[dict], generation: int = 0) -> None:
+        """Insert or update events by provider_unique_id.
+
+        The events are stamped online with the sync `generation` of the
+        ingest run, and the summaries of their days are refreshed.
+        """
+
+    @abstractmethod
+    async def sweep(self, generation: int) -> Sequence[Mapping]:
+        """Take the online events of older generations offline.
+
+        Returns the start and end dates of the swept events.
+        """
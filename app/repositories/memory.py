@@ -0,0 +1,185 @@
+"""Event repository held in memory, on sorted arrays.
+
+It serves the tests without a database, and read-only deployments (at the
+edge, say) loaded from a feed snapshot on startup.
+
+Like the Postgres indexes, the events are kept in two arrays sorted by start
+date: all of them, and the online ones only. A search bisects the array for
+the start date range and filters the slice. The arrays are rebuilt on the
+first read after a write, so a bulk load sorts once.
+"""
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from functools import lru_cache
+from itertools import groupby
+from typing import Sequence
+from uuid import uuid4
+
+from app.models.event import OFFLINE, ONLINE
+
+from app.repositories.base import DaySummary, EventQuery, EventRepository, EventRow, deduplicate_events  # isort: skip  # fmt: skip # noqa: E501
+
+
+@dataclass(slots=True)
+class _StoredEvent:
+    row: EventRow
+    status: str
+    sync_generation: int
+    title_words: tuple[str, ...]
+
+
+@dataclass(slots=True)
+class _SortedEvents:
+    start_dates: list[date]
+    events: list[_StoredEvent]
+
+    @classmethod
+    def of(cls, events: list[_StoredEvent]) -> "_SortedEvents":
+        events = sorted(events, key=lambda event: event.row.start_date)
+        return cls([event.row.start_date for event in events], events)
+
+    def starting_between(
+        self,
+        starts_on: date,
+        ends_on: date,
+    ) -> list[_StoredEvent]:
+        first = bisect_left(self.start_dates, starts_on)
+        last = bisect_right(self.start_dates, ends_on)
+        return self.events[first:last]
+
+
+def _title_words(title: str) -> tuple[str, ...]:
+    # Like the 'simple' text search configuration of Postgres
+    return tuple(re.findall(r"\w+", title.lower()))
+
+
+def _matches(event: _StoredEvent, query: EventQuery) -> bool:
+    row = event.row
+    if row.end_date is None or row.end_date > query.ends_on:
+        return False
+    if query.min_price is not None and (
+        row.max_price is None or row.max_price < query.min_price
+    ):
+        return False
+    if query.max_price is not None and (
+        row.min_price is None or row.min_price > query.max_price
+    ):
+        return False
+    return all(
+        any(title_word.startswith(word) for title_word in event.title_words)
+        for word in query.words
+    )
+
+
+def _relevance(event: _StoredEvent, words: tuple[str, ...]) -> int:
+    """Title words matched by the query, an approximation of ts_rank."""
+    return sum(
+        any(title_word.startswith(word) for word in words)
+        for title_word in event.title_words
+    )
+
+
+class InMemoryEventRepository(EventRepository):
+    """Events held by this process."""
+
+    def __init__(self):
+        self._events: dict[str, _StoredEvent] = {}
+        self._all: _SortedEvents | None = None
+        self._online: _SortedEvents | None = None
+
+    def _sorted(self, include_offline: bool) -> _SortedEvents:
+        if self._all is None:
+            events = list(self._events.values())
+            self._all = _SortedEvents.of(events)
+            self._online = _SortedEvents.of(
+                [event for event in events if event.status == ONLINE]
+            )
+        return self._all if include_offline else self._online
+
+    def _invalidate(self) -> None:
+        self._all = self._online = None
+
+    async def search(self, query: EventQuery) -> Sequence[EventRow]:
+        candidates = self._sorted(query.include_offline).starting_between(
+            query.starts_on, query.ends_on
+        )
+        events = [event for event in candidates if _matches(event, query)]
+
+        # Sorts are stable, so ties stay by start date
+        if query.words and query.order_by in (None, "relevance"):
+            events.sort(key=lambda event: -_relevance(event, query.words))
+        elif query.order_by == "price":
+            events.sort(
+                key=lambda event: (
+                    event.row.min_price is None,
+                    event.row.min_price or 0.0,
+                )
+            )
+        if query.limit is not None:
+            events = events[: query.limit]
+        return [event.row for event in events]
+
+    async def day_summaries(
+        self, starts_on: date, ends_on: date
+    ) -> Sequence[DaySummary]:
+        events = self._sorted(False).starting_between(starts_on, ends_on)
+        summaries = []
+        for day, day_events in groupby(events, lambda e: e.row.start_date):
+            rows = [event.row for event in day_events]
+            min_prices = [r.min_price for r in rows if r.min_price is not None]
+            max_prices = [r.max_price for r in rows if r.max_price is not None]
+            summaries.append(
+                DaySummary(
+                    day,
+                    len(rows),
+                    min(min_prices, default=None),
+                    max(max_prices, default=None),
+                )
+            )
+        return summaries
+
+    async def upsert(self, events: list[dict], generation: int = 0) -> None:
+        for event in deduplicate_events(events):
+            key = event["provider_unique_id"]
+            stored = self._events.get(key)
+            row = EventRow(
+                id=stored.row.id if stored else uuid4(),
+                title=event["title"],
+                start_date=event["start_date"],
+                start_time=event.get("start_time"),
+                end_date=event.get("end_date"),
+                end_time=event.get("end_time"),
+                min_price=event.get("min_price"),
+                max_price=event.get("max_price"),
+            )
+            self._events[key] = _StoredEvent(
+                row=row,
+                status=ONLINE,
+                sync_generation=generation,
+                title_words=_title_words(row.title),
+            )
+        self._invalidate()
+
+    async def sweep(self, generation: int) -> Sequence[dict]:
+        swept = []
+        for event in self._events.values():
+            if event.status == ONLINE and event.sync_generation < generation:
+                event.status = OFFLINE
+                swept.append(
+                    {
+                        "start_date": event.row.start_date,
+                        "end_date": event.row.end_date,
+                    }
+                )
+        if swept:
+            self._invalidate()
+        return swept
+
+
+@lru_cache
+def get_memory_repository() -> InMemoryEventRepository:
+    """The events of this process, when EVENT_REPOSITORY is `memory`."""
+    return InMemoryEventRepository()
@@ -0,0 +1,223 @@
+"""Event repository backed by Postgres."""
+
+import logging
+from datetime import date
+from typing import Iterable, Sequence
+
+from sqlalchemy import RowMapping, Select, delete, exists, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.event import OFFLINE, ONLINE, ONLINE_ONLY, Event, EventDaySummary  # isort: skip  # fmt: skip # noqa: E501
+from app.repositories.base import SUMMARY_FIELDS, DaySummary, EventQuery, EventRepository, EventRow, deduplicate_events  # isort: skip  # fmt: skip # noqa: E501
+
+logger = logging.getLogger(__name__)
+
+# Columns of EventSummary, all held by `idx_date_range_price`
+SUMMARY_COLUMNS = tuple(getattr(Event, field) for field in SUMMARY_FIELDS)
+
+# Columns filled in by SQLAlchemy when an inserted event lacks them
+CLIENT_DEFAULT_COLUMNS = frozenset(
+    column.name for column in Event.__table__.columns if column.default
+)
+
+
+def build_search_statement(query: EventQuery) -> Select:
+    """Build the search statement.
+
+    The date predicate is served by `idx_date_range_price`, which also
+    holds both prices and every selected column, so the price filters
+    are checked inside the index and the scan can be index-only. That
+    index only holds the online events: searches including the offline
+    ones fall back to `idx_date_range`.
+
+    The text search matches every word as a title prefix through the
+    `idx_title_search` GIN index. Results are ranked by relevance unless
+    another order is requested.
+    """
+    statement = select(*SUMMARY_COLUMNS).where(
+        Event.start_date >= query.starts_on,
+        # Implied by end_date <= ends_on, but bounds the index range scan
+        Event.start_date <= query.ends_on,
+        Event.end_date <= query.ends_on,
+    )
+    if not query.include_offline:
+        statement = statement.where(ONLINE_ONLY)
+    # An event matches when any of its tickets falls in the price range
+    if query.min_price is not None:
+        statement = statement.where(Event.max_price >= query.min_price)
+    if query.max_price is not None:
+        statement = statement.where(Event.min_price <= query.max_price)
+    if query.limit is not None:
+        statement = statement.limit(query.limit)
+
+    if query.words:
+        prefixes = " & ".join(f"{word}:*" for word in query.words)
+        text_query = func.to_tsquery("simple", prefixes)
+        matches = Event.title_search.op("@@")(text_query)
+        statement = statement.where(matches)
+        if query.order_by in (None, "relevance"):
+            rank = func.ts_rank(Event.title_search, text_query)
+            return statement.order_by(rank.desc(), Event.start_date)
+
+    if query.order_by == "price":
+        cheapest_first = Event.min_price.asc().nulls_last()
+        return statement.order_by(cheapest_first, Event.start_date)
+    return statement.order_by(Event.start_date)
+
+
+class PostgresEventRepository(EventRepository):
+    """Events of the `events` table, through the given session.
+
+    Reads run in their own transaction. Writes commit, and roll back on
+    error.
+    """
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    @staticmethod
+    def _stamp(generation: int) -> dict:
+        """Columns set on every upserted event on top of its fields."""
+        return {"sync_generation": generation, "status": ONLINE}
+
+    @classmethod
+    def row_parameters(cls, event: dict) -> int:
+        """Bind parameters of the row upserting `event`."""
+        return len({*event, *cls._stamp(0), *CLIENT_DEFAULT_COLUMNS})
+
+    async def search(self, query: EventQuery) -> Sequence[EventRow]:
+        async with self.session.begin():
+            result = await self.session.execute(build_search_statement(query))
+            return result.all()
+
+    async def day_summaries(
+        self, starts_on: date, ends_on: date
+    ) -> Sequence[DaySummary]:
+        """Read from the pre-aggregated `event_day_summaries` table.
+
+        A month view only scans one row per day.
+        """
+        statement = (
+            select(*(getattr(EventDaySummary, f) for f in DaySummary._fields))
+            .where(
+                EventDaySummary.day >= starts_on,
+                EventDaySummary.day <= ends_on,
+            )
+            .order_by(EventDaySummary.day)
+        )
+        async with self.session.begin():
+            result = await self.session.execute(statement)
+            return result.all()
+
+    async def upsert(self, events: list[dict], generation: int = 0) -> None:
+        """Upsert the events with ON CONFLICT.
+
+        Events repeated within the batch are collapsed first, the last one
+        wins. A batch must fit in MAX_BIND_PARAMETERS, at `row_parameters`
+        per event. The per-day summaries of the days touched by the batch,
+        including the days the events moved away from, are refreshed in the
+        same transaction.
+        """
+        if not events:
+            logger.info("No events to upsert.")
+            return
+
+        events = deduplicate_events(events)
+        stamp = self._stamp(generation)
+
+        try:
+            ids = [event["provider_unique_id"] for event in events]
+            previous_days = await self.session.scalars(
+                select(Event.start_date)
+                .where(Event.provider_unique_id.in_(ids))
+                .distinct()
+            )
+            days = {event["start_date"] for event in events}
+            days.update(previous_days)
+
+            stmt = insert(Event).values([event | stamp for event in events])
+            update_dict = {
+                c.name: getattr(stmt.excluded, c.name)
+                for c in Event.__table__.columns
+                if c.name != "id" and c.computed is None
+            }
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["provider_unique_id"],
+                set_=update_dict,
+            )
+
+            await self.session.execute(stmt)
+            await self.refresh_day_summaries(days)
+            await self.session.commit()
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error saving events to the database: {e}")
+            raise
+
+    async def sweep(self, generation: int) -> Sequence[RowMapping]:
+        """A single set-based UPDATE, through `idx_online_generation`.
+
+        The swept events are kept as history, out of the partial search
+        index. The per-day summaries of their days are refreshed in the
+        same transaction.
+        """
+        stmt = (
+            update(Event)
+            .where(ONLINE_ONLY, Event.sync_generation < generation)
+            .values(status=OFFLINE)
+            .returning(Event.start_date, Event.end_date)
+            .execution_options(synchronize_session=False)
+        )
+        try:
+            result = await self.session.execute(stmt)
+            swept = result.mappings().all()
+            await self.refresh_day_summaries(e["start_date"] for e in swept)
+            await self.session.commit()
+        except SQLAlchemyError as e:
+            await self.session.rollback()
+            logger.error(f"Error sweeping the missing events: {e}")
+            raise
+        return swept
+
+    async def refresh_day_summaries(self, days: Iterable[date]) -> None:
+        """Recompute the per-day summaries of the given days from `events`.
+
+        Only the touched days are re-aggregated, so the cost is proportional
+        to the batch and not to the whole table. Only the online events
+        count, and days left without any are dropped. The caller owns the
+        transaction.
+        """
+        days = sorted(set(days))
+        if not days:
+            return
+
+        aggregate = (
+            select(
+                Event.start_date,
+                func.count(),
+                func.min(Event.min_price),
+                func.max(Event.max_price),
+            )
+            .where(Event.start_date.in_(days), ONLINE_ONLY)
+            .group_by(Event.start_date)
+        )
+        stmt = insert(EventDaySummary).from_select(
+            ["day", "event_count", "min_price", "max_price"], aggregate
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["day"],
+            set_={
+                "event_count": stmt.excluded.event_count,
+                "min_price": stmt.excluded.min_price,
+                "max_price": stmt.excluded.max_price,
+            },
+        )
+        await self.session.execute(stmt)
+
+        online_that_day = exists().where(
+            Event.start_date == EventDaySummary.day, ONLINE_ONLY
+        )
+        empty_days = EventDaySummary.day.in_(days) & ~online_that_day
+        await self.session.execute(delete(EventDaySummary).where(empty_days))
@@ -1,10 +1,13 @@
 """Schemas for the events."""
 
 from datetime import date, time
+from typing import Literal
 from uuid import UUID
 
 from pydantic import BaseModel, Field
 
+SearchOrder = Literal["start_date", "price", "relevance"]
+
 
 class EventSummary(BaseModel):
     """Event summary schema."""
@@ -44,6 +47,30 @@ class EventList(BaseModel):
     events: list[EventSummary]
 
 
+class DayFacet(BaseModel):
+    """Aggregated figures for the events starting on a single day."""
+
+    day: date = Field(..., description="Day the events start on")
+    event_count: int = Field(
+        ...,
+        description="Number of events starting on that day",
+    )
+    min_price: float | None = Field(
+        None,
+        description="Min price from all the events of the day",
+    )
+    max_price: float | None = Field(
+        None,
+        description="Max price from all the events of the day",
+    )
+
+
+class DayFacetList(BaseModel):
+    """List of per-day facets."""
+
+    days: list[DayFacet]
+
+
 class ErrorResponse(BaseModel):
     """Error response schema."""
 
@@ -58,6 +85,13 @@ class SearchSuccessResponse(BaseModel):
     error: None = None
 
 
+class FacetsSuccessResponse(BaseModel):
+    """Facets response schema."""
+
+    data: DayFacetList | None = None
+    error: None = None
+
+
 class SearchErrorResponse(BaseModel):
     """Search error response schema."""
 
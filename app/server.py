@@ -0,0 +1,204 @@
+"""Production server: a supervisor of uvicorn worker processes.
+
+Each worker runs uvicorn with uvloop and httptools on its own SO_REUSEPORT
+socket, so the kernel spreads the incoming connections over the workers.
+The supervisor:
+
+- respawns the workers that exit, which they do once recycled after
+  WORKER_MAX_REQUESTS requests (plus a random jitter, so they don't all
+  recycle at once),
+- reloads the workers one at a time on SIGHUP, starting each replacement
+  before stopping the worker it replaces,
+- stops the workers gracefully on SIGTERM and SIGINT.
+
+    python -m app.server
+"""
+
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import time
+from dataclasses import dataclass
+from multiprocessing.context import SpawnProcess
+from multiprocessing.synchronize import Event
+from typing import Callable
+
+import uvicorn
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+APP = "app.main:app"
+SUPERVISE_INTERVAL_SECONDS = 0.5
+WORKER_READY_TIMEOUT_SECONDS = 60.0
+RESPAWN_BACKOFF_SECONDS = 1.0
+
+# Workers import the app from scratch, which is what a reload needs
+_context = multiprocessing.get_context("spawn")
+
+
+def available_cpus() -> int:
+    """Cores this process may run on, honoring the CPU affinity."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Socket bound to `port` alongside the ones of the other workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    return sock
+
+
+class WorkerServer(uvicorn.Server):
+    """uvicorn server telling the supervisor when it accepts requests."""
+
+    def __init__(self, config: uvicorn.Config, ready: Event):
+        super().__init__(config)
+        self.ready = ready
+
+    async def startup(self, sockets: list[socket.socket] | None = None):
+        await super().startup(sockets)
+        if not self.should_exit:
+            self.ready.set()
+
+
+def run_worker(ready: Event) -> None:
+    """Serve the app until the worker is stopped or recycled."""
+    settings = get_settings()
+    max_requests = None
+    if settings.WORKER_MAX_REQUESTS:
+        jitter = random.randint(0, settings.WORKER_MAX_REQUESTS_JITTER)
+        max_requests = settings.WORKER_MAX_REQUESTS + jitter
+    config = uvicorn.Config(
+        APP,
+        loop="uvloop",
+        http="httptools",
+        limit_max_requests=max_requests,
+        timeout_graceful_shutdown=settings.WORKER_GRACEFUL_TIMEOUT,
+    )
+    sock = bind_socket(settings.SERVER_HOST, settings.SERVER_PORT)
+    WorkerServer(config, ready).run(sockets=[sock])
+
+
+@dataclass
+class Worker:
+    process: SpawnProcess
+    ready: Event
+
+
+class Supervisor:
+    """Keep `workers` processes running `target`.
+
+    `target` is called in each worker process with an event to set once
+    the worker is ready to serve.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        target: Callable[[Event], None] = run_worker,
+        stop_timeout: float | None = None,
+    ):
+        self.size = workers
+        self.target = target
+        if stop_timeout is None:
+            # Time to drain the requests in flight and run the shutdown
+            stop_timeout = get_settings().WORKER_GRACEFUL_TIMEOUT + 5
+        self.stop_timeout = stop_timeout
+        self.workers: list[Worker] = []
+        self._signals: list[int] = []
+
+    def spawn(self) -> Worker:
+        ready = _context.Event()
+        process = _context.Process(target=self.target, args=(ready,))
+        process.start()
+        return Worker(process, ready)
+
+    def terminate(self, worker: Worker) -> None:
+        """Stop a worker, letting it finish the requests in flight."""
+        worker.process.terminate()
+        self._join(worker)
+
+    def _join(self, worker: Worker) -> None:
+        worker.process.join(self.stop_timeout)
+        if worker.process.is_alive():
+            logger.warning(f"Killing worker {worker.process.pid}.")
+            worker.process.kill()
+            worker.process.join()
+
+    def start(self) -> None:
+        self.workers = [self.spawn() for _ in range(self.size)]
+        logger.info(f"Started {self.size} workers.")
+
+    def respawn_exited(self) -> None:
+        """Replace the workers that exited, recycled or crashed."""
+        for index, worker in enumerate(self.workers):
+            if worker.process.is_alive():
+                continue
+            exitcode = worker.process.exitcode
+            logger.info(f"Worker {worker.process.pid} exited ({exitcode}).")
+            if not worker.ready.is_set():
+                # It never came up, don't spin on a broken deploy
+                time.sleep(RESPAWN_BACKOFF_SECONDS)
+            self.workers[index] = self.spawn()
+
+    def reload(self) -> None:
+        """Replace the workers one at a time, keeping the capacity."""
+        logger.info("Reloading the workers.")
+        for index, worker in enumerate(self.workers):
+            replacement = self.spawn()
+            if not replacement.ready.wait(WORKER_READY_TIMEOUT_SECONDS):
+                logger.error("New worker did not start, reload aborted.")
+                self.terminate(replacement)
+                return
+            self.workers[index] = replacement
+            self.terminate(worker)
+
+    def stop(self) -> None:
+        for worker in self.workers:
+            worker.process.terminate()
+        for worker in self.workers:
+            self._join(worker)
+        self.workers = []
+
+    def _on_signal(self, sig: int, _frame) -> None:
+        self._signals.append(sig)
+
+    def run(self) -> None:
+        """Supervise the workers until SIGTERM or SIGINT."""
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(sig, self._on_signal)
+        self.start()
+        try:
+            while True:
+                if self._signals:
+                    if self._signals.pop(0) != signal.SIGHUP:
+                        break
+                    self.reload()
+                self.respawn_exited()
+                time.sleep(SUPERVISE_INTERVAL_SECONDS)
+        finally:
+            logger.info("Stopping the workers.")
+            self.stop()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    settings = get_settings()
+    workers = settings.WEB_CONCURRENCY or available_cpus()
+    # Read back by the workers to size their connection pools
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    Supervisor(workers).run()
+
+
+if __name__ == "__main__":
+    main()
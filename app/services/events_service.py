@@ -1,14 +1,16 @@
 """Service layer for event-related operations."""
 
+import re
 from datetime import datetime, timezone
+from typing import Sequence
 
 from fastapi import HTTPException
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.event import Event
+from app.core.cache import get_search_cache
+from app.core.config import get_settings
+from app.repositories.base import EventQuery, EventRepository, EventRow
 
-from app.schemas.event import ErrorResponse, EventList, EventSummary, SearchErrorResponse, SearchSuccessResponse  # isort: skip  # fmt: skip # noqa: E501
+from app.schemas.event import DayFacet, DayFacetList, ErrorResponse, EventList, EventSummary, FacetsSuccessResponse, SearchErrorResponse, SearchOrder, SearchSuccessResponse  # isort: skip  # fmt: skip # noqa: E501
 
 
 class EventService:
@@ -32,40 +34,168 @@ class EventService:
                 status_code=400, detail="starts_at must be before ends_at"
             )
 
+    @staticmethod
+    def _validate_price_range(
+        min_price: float | None,
+        max_price: float | None,
+    ) -> None:
+        """Validate that min_price is not above max_price."""
+        if None in (min_price, max_price):
+            return
+        if min_price > max_price:
+            raise HTTPException(
+                status_code=400, detail="min_price must not exceed max_price"
+            )
+
+    @staticmethod
+    def _text_words(q: str) -> tuple[str, ...]:
+        """Words of `q`, each matched as a title prefix."""
+        words = re.findall(r"\w+", q.lower())
+        if not words:
+            raise HTTPException(
+                status_code=400, detail="q must contain at least one word"
+            )
+        return tuple(words)
+
+    @staticmethod
+    def build_query(
+        starts_at: datetime,
+        ends_at: datetime,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        order_by: SearchOrder | None = None,
+        q: str | None = None,
+        include_offline: bool = False,
+    ) -> EventQuery:
+        """Validate the search parameters into a repository query.
+
+        Searches by text are capped at SEARCH_TEXT_LIMIT results.
+        """
+        starts_at = EventService._ensure_utc_timezone(starts_at)
+        ends_at = EventService._ensure_utc_timezone(ends_at)
+
+        EventService._validate_date_range(starts_at, ends_at)
+        EventService._validate_price_range(min_price, max_price)
+
+        words = EventService._text_words(q) if q is not None else ()
+        return EventQuery(
+            starts_on=starts_at.date(),
+            ends_on=ends_at.date(),
+            min_price=min_price,
+            max_price=max_price,
+            order_by=order_by,
+            words=words,
+            include_offline=include_offline,
+            limit=get_settings().SEARCH_TEXT_LIMIT if words else None,
+        )
+
     async def search_events(
-        self, session: AsyncSession, starts_at: datetime, ends_at: datetime
+        self,
+        repository: EventRepository,
+        starts_at: datetime,
+        ends_at: datetime,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        order_by: SearchOrder | None = None,
+        q: str | None = None,
+        include_offline: bool = False,
     ) -> SearchSuccessResponse | SearchErrorResponse:
         """Search for events within a given date range.
 
         Args:
             starts_at: Start date/time to search from (inclusive)
             ends_at: End date/time to search until (inclusive)
+            min_price: Only events with tickets at or above this price
+            max_price: Only events with tickets at or below this price
+            order_by: Sort events by start date, lowest price or relevance
+            q: Only events whose title has words starting with those of q
+            include_offline: Also events no longer listed in the feed
 
         Returns:
             SearchSuccessResponse containing list of matching events or
             SearchErrorResponse containing error details
         """
+        rows = await self.search_rows(
+            repository,
+            starts_at,
+            ends_at,
+            min_price,
+            max_price,
+            order_by,
+            q,
+            include_offline,
+        )
+
+        summaries = [EventSummary.model_validate(r._asdict()) for r in rows]
+        if summaries:
+            return SearchSuccessResponse(data=EventList(events=summaries))
+        else:
+            return SearchErrorResponse(
+                error=ErrorResponse(code="404", message="No events found")
+            )
+
+    async def search_rows(
+        self,
+        repository: EventRepository,
+        starts_at: datetime,
+        ends_at: datetime,
+        min_price: float | None = None,
+        max_price: float | None = None,
+        order_by: SearchOrder | None = None,
+        q: str | None = None,
+        include_offline: bool = False,
+    ) -> Sequence[EventRow]:
+        """Search like `search_events`, returning the raw result rows.
+
+        Rows are tuples of the SUMMARY_FIELDS, in that order, so bulk
+        encoders can build their output without a Pydantic object per event.
+        They are read through the search cache of the worker, which also
+        keeps the empty results.
+        """
+        query = self.build_query(
+            starts_at,
+            ends_at,
+            min_price,
+            max_price,
+            order_by,
+            q,
+            include_offline,
+        )
+        cache = get_search_cache()
+        rows = cache.get(query)
+        if rows is None:
+            version = cache.version
+            rows = await repository.search(query)
+            cache.put(query, rows, version)
+        return rows
+
+    async def get_day_facets(
+        self,
+        repository: EventRepository,
+        starts_at: datetime,
+        ends_at: datetime,
+    ) -> FacetsSuccessResponse | SearchErrorResponse:
+        """Get the per-day event count and price range within a date range.
+
+        Args:
+            starts_at: Start date/time to aggregate from (inclusive)
+            ends_at: End date/time to aggregate until (inclusive)
+
+        Returns:
+            FacetsSuccessResponse containing one facet per day with events or
+            SearchErrorResponse containing error details
+        """
         starts_at = self._ensure_utc_timezone(starts_at)
         ends_at = self._ensure_utc_timezone(ends_at)
 
         self._validate_date_range(starts_at, ends_at)
 
-        async with session.begin():
-            statement = select(Event).where(
-                Event.start_date >= starts_at.date(),
-                Event.end_date <= ends_at.date(),
+        days = await repository.day_summaries(starts_at.date(), ends_at.date())
+
+        facets = [DayFacet.model_validate(day._asdict()) for day in days]
+        if facets:
+            return FacetsSuccessResponse(data=DayFacetList(days=facets))
+        else:
+            return SearchErrorResponse(
+                error=ErrorResponse(code="404", message="No events found")
             )
-            result = await session.execute(statement)
-            events = result.scalars().all()
-
-            event_summaries = [
-                EventSummary.model_validate(event.__dict__) for event in events
-            ]
-            if event_summaries:
-                return SearchSuccessResponse(
-                    data=EventList(events=event_summaries)
-                )  # noqa: E501
-            else:
-                return SearchErrorResponse(
-                    error=ErrorResponse(code="404", message="No events found")
-                )
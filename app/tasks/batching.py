@@ -0,0 +1,72 @@
+"""Adaptive batching of the event upserts."""
+
+from typing import Callable, Iterator
+
+from app.core.config import get_settings
+
+# Postgres caps a single statement at 32767 bind parameters
+MAX_BIND_PARAMETERS = 32767
+
+
+def event_parameters(event: dict) -> int:
+    """Bind parameters of a row inserting `event` as is."""
+    # One parameter per field, plus the generated primary key
+    return len(event) + 1
+
+
+class AdaptiveBatcher:
+    """Size the upsert batches from the measured statement latency.
+
+    After every batch the size is scaled towards the one that would have
+    taken INGEST_BATCH_TARGET_SECONDS, so round-trips are amortized over as
+    many rows as the database absorbs without long statements. The size
+    changes by at most 2x per batch and never exceeds the bind parameter
+    budget of a statement, counted with `row_parameters`: the columns the
+    writer actually inserts for each event.
+    """
+
+    def __init__(
+        self,
+        initial_size: int | None = None,
+        min_size: int | None = None,
+        max_size: int | None = None,
+        target_seconds: float | None = None,
+        row_parameters: Callable[[dict], int] = event_parameters,
+    ):
+        settings = get_settings()
+        self.min_size = min_size or settings.INGEST_BATCH_MIN_SIZE
+        self.max_size = max_size or settings.INGEST_BATCH_MAX_SIZE
+        target_seconds = target_seconds or settings.INGEST_BATCH_TARGET_SECONDS
+        self.target_seconds = target_seconds
+        self.size = self._clamp(initial_size or settings.INGEST_BATCH_SIZE)
+        self.row_parameters = row_parameters
+
+    def _clamp(self, size: int) -> int:
+        return max(self.min_size, min(self.max_size, size))
+
+    def row_limit(self, event: dict) -> int:
+        """Most rows like `event` that fit in one statement."""
+        return MAX_BIND_PARAMETERS // self.row_parameters(event)
+
+    def batches(
+        self, events: list[dict], start: int = 0
+    ) -> Iterator[tuple[int, list[dict]]]:
+        """Yield the batches from `start` with the offset following each.
+
+        The size is read when each batch is cut, so `record` calls made
+        between iterations apply to the next batch.
+        """
+        offset = start
+        while offset < len(events):
+            size = min(self.size, self.row_limit(events[offset]))
+            batch = events[offset : offset + size]  # noqa: E203
+            offset += len(batch)
+            yield offset, batch
+
+    def record(self, rows: int, seconds: float) -> None:
+        """Adapt the batch size to the latency of a batch of `rows`."""
+        if rows < self.size:
+            return  # A short tail batch says nothing about the full size
+        scale = self.target_seconds / max(seconds, 1e-3)
+        scale = max(0.5, min(2.0, scale))
+        self.size = self._clamp(int(self.size * scale))
@@ -0,0 +1,186 @@
+"""Compressed and resumable download of the provider feed.
+
+The feed is requested with gzip or brotli content coding and decoded while
+it streams in. The encoded bytes are spooled to a `.part` file next to a
+small JSON sidecar holding the validator (strong ETag or Last-Modified) and
+the content coding of the response. When the connection breaks, the next
+attempt asks for the missing bytes only, with `Range` and an `If-Range`
+validator: a 206 continues the spooled body, which is replayed through the
+decoder first, while a 200 means the feed changed (or ranges are not
+supported) and the download starts over.
+"""
+
+import json
+import logging
+import tempfile
+import zlib
+from pathlib import Path
+
+import brotli
+import httpx
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ACCEPT_ENCODING = "br, gzip"
+CHUNK_SIZE = 64 * 1024
+
+
+class DownloadError(Exception):
+    """The downloaded body is not a complete feed."""
+
+
+class StreamDecoder:
+    """Decode a body with the given content coding, chunk by chunk."""
+
+    def __init__(self, encoding: str | None):
+        self.encoding = (encoding or "identity").lower()
+        if self.encoding == "gzip":
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding == "br":
+            self._brotli = brotli.Decompressor()
+        elif self.encoding != "identity":
+            raise DownloadError(f"Unsupported content coding {encoding}")
+
+    def decode(self, chunk: bytes) -> bytes:
+        if self.encoding == "gzip":
+            return self._zlib.decompress(chunk)
+        if self.encoding == "br":
+            return self._brotli.process(chunk)
+        return chunk
+
+    def flush(self) -> bytes:
+        """Rest of the body, which must be a complete compressed stream."""
+        if self.encoding == "gzip":
+            rest = self._zlib.flush()
+            complete = self._zlib.eof
+        elif self.encoding == "br":
+            rest = b""
+            complete = self._brotli.is_finished()
+        else:
+            return b""
+        if not complete:
+            raise DownloadError(f"Truncated {self.encoding} body")
+        return rest
+
+
+def _sidecar_path(part_path: Path) -> Path:
+    return part_path.with_name(f"{part_path.name}.json")
+
+
+def discard(part_path: Path) -> None:
+    """Remove a partial download and its sidecar."""
+    part_path.unlink(missing_ok=True)
+    _sidecar_path(part_path).unlink(missing_ok=True)
+
+
+def _validator(headers: httpx.Headers) -> str | None:
+    """If-Range validator of a response, which must be strong for an ETag."""
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return headers.get("last-modified")
+
+
+def _resume_point(part_path: Path) -> tuple[int, dict]:
+    """Spooled bytes and sidecar of a partial download, if resumable."""
+    sidecar_path = _sidecar_path(part_path)
+    if not part_path.exists() or not sidecar_path.exists():
+        return 0, {}
+    sidecar = json.loads(sidecar_path.read_text())
+    if not sidecar.get("validator"):
+        return 0, {}
+    return part_path.stat().st_size, sidecar
+
+
+def _range_start(content_range: str | None) -> int | None:
+    """First byte of a `bytes first-last/length` Content-Range."""
+    unit, _, span = (content_range or "").partition(" ")
+    first = span.partition("-")[0]
+    if unit != "bytes" or not first.isdigit():
+        return None
+    return int(first)
+
+
+async def _download_once(
+    client: httpx.AsyncClient,
+    url: str,
+    part_path: Path,
+) -> bytes:
+    offset, sidecar = _resume_point(part_path)
+    headers = {"Accept-Encoding": ACCEPT_ENCODING}
+    if offset:
+        headers["Accept-Encoding"] = sidecar["encoding"] or "identity"
+        headers["Range"] = f"bytes={offset}-"
+        headers["If-Range"] = sidecar["validator"]
+
+    async with client.stream("GET", url, headers=headers) as response:
+        if response.status_code == 416:
+            # The spool is not a prefix of the current feed
+            discard(part_path)
+            return await _download_once(client, url, part_path)
+        response.raise_for_status()
+
+        resumed = response.status_code == 206
+        start = _range_start(response.headers.get("content-range"))
+        if resumed and start != offset:
+            raise DownloadError("Range response does not continue the spool")
+        encoding = response.headers.get("content-encoding")
+        decoder = StreamDecoder(encoding)
+        body = bytearray()
+        if resumed:
+            logger.info(f"Resuming the download after {offset} bytes.")
+            with open(part_path, "rb") as spool:
+                while chunk := spool.read(CHUNK_SIZE):
+                    body += decoder.decode(chunk)
+        else:
+            part_path.parent.mkdir(parents=True, exist_ok=True)
+            sidecar = {
+                "validator": _validator(response.headers),
+                "encoding": encoding,
+            }
+            _sidecar_path(part_path).write_text(json.dumps(sidecar))
+
+        with open(part_path, "ab" if resumed else "wb") as spool:
+            # Unbuffered, so every received byte reaches the spool
+            async for chunk in response.aiter_raw():
+                spool.write(chunk)
+                body += decoder.decode(chunk)
+
+    body += decoder.flush()
+    return bytes(body)
+
+
+async def download_feed(url: str, part_path: Path | None = None) -> bytes:
+    """Download and decode the feed, resuming broken transfers.
+
+    The encoded body is spooled to `part_path`, which a later call resumes
+    from if this one fails, or to a temporary file without one. Transport
+    errors are retried from the spool up to DOWNLOAD_ATTEMPTS times.
+    """
+    if part_path is None:
+        with tempfile.TemporaryDirectory() as spool_dir:
+            return await download_feed(url, Path(spool_dir) / "feed.part")
+
+    settings = get_settings()
+    timeout = httpx.Timeout(
+        connect=settings.DOWNLOAD_CONNECT_TIMEOUT_SECONDS,
+        read=settings.DOWNLOAD_READ_TIMEOUT_SECONDS,
+        write=settings.DOWNLOAD_CONNECT_TIMEOUT_SECONDS,
+        pool=settings.DOWNLOAD_CONNECT_TIMEOUT_SECONDS,
+    )
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        for attempt in range(1, settings.DOWNLOAD_ATTEMPTS + 1):
+            try:
+                payload = await _download_once(client, url, part_path)
+            except httpx.TransportError as exc:
+                if attempt == settings.DOWNLOAD_ATTEMPTS:
+                    raise
+                logger.warning(f"Download interrupted, resuming: {exc!r}")
+                continue
+            except DownloadError:
+                discard(part_path)  # The next attempt starts over
+                raise
+            discard(part_path)
+            return payload
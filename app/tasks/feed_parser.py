@@ -0,0 +1,153 @@
+"""Parsing of the provider feed into event rows.
+
+Kept apart from the ingest task so the API can load feed snapshots without
+importing the Celery app.
+"""
+
+import asyncio
+import logging
+import os
+import re
+from datetime import datetime
+
+import billiard
+from lxml import etree
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+XML_DECLARATION_PATTERN = re.compile(rb"\s*<\?xml[^>]*\?>")
+# Non-greedy so each match ends at the closing tag of its own base_event
+BASE_EVENT_PATTERN = re.compile(rb"<base_event\b.*?</base_event>", re.DOTALL)
+
+
+async def parse_feed(xml_content: bytes) -> list[dict]:
+    """Parse the feed, fanning large ones out over a process pool.
+
+    Feeds over PARSE_PARALLEL_THRESHOLD_BYTES are split at `base_event`
+    boundaries and the chunks are parsed in worker processes, so the event
+    loop stays free and parsing uses every core. The events are returned in
+    feed order. A malformed `base_event` yields no events at all, like in
+    `parse_xml`, but markup between the `base_event`s is not parsed.
+
+    The pool is billiard's (it ships with Celery): the prefork workers of
+    Celery are daemonic, and the stdlib pools refuse to start in them.
+    """
+    settings = get_settings()
+    if len(xml_content) < settings.PARSE_PARALLEL_THRESHOLD_BYTES:
+        return parse_xml(xml_content)
+
+    workers = settings.PARSE_WORKERS or os.cpu_count() or 1
+    # A few chunks per worker keeps the pool busy when chunks are uneven
+    chunks = split_feed(xml_content, len(xml_content) // (workers * 4) + 1)
+    logger.info(f"Parsing {len(chunks)} chunks over {workers} processes.")
+
+    with billiard.get_context("spawn").Pool(workers) as pool:
+        results = await asyncio.to_thread(pool.map, _parse_chunk, chunks)
+
+    if any(result is None for result in results):
+        return []
+    return [event for result in results for event in result]
+
+
+def split_feed(xml_content: bytes, chunk_size: int) -> list[bytes]:
+    """Split the feed into standalone documents of whole `base_event`s.
+
+    Each chunk holds consecutive `base_event` elements adding up to about
+    `chunk_size` bytes, keeps the XML declaration of the feed (and so its
+    encoding), and is wrapped in its own root element.
+    """
+    declaration = XML_DECLARATION_PATTERN.match(xml_content)
+    prefix = (declaration.group().strip() if declaration else b"") + b"<root>"
+
+    chunks = []
+    elements = []
+    size = 0
+    for match in BASE_EVENT_PATTERN.finditer(xml_content):
+        elements.append(match.group())
+        size += len(elements[-1])
+        if size >= chunk_size:
+            chunks.append(prefix + b"".join(elements) + b"</root>")
+            elements = []
+            size = 0
+    if elements:
+        chunks.append(prefix + b"".join(elements) + b"</root>")
+    return chunks
+
+
+def _parse_chunk(chunk: bytes) -> list[dict] | None:
+    """Parse a chunk in a worker process, None if it is malformed."""
+    try:
+        root = etree.fromstring(chunk)
+    except etree.XMLSyntaxError as e:
+        logger.error(f"XML parsing error: {e}")
+        return None
+    return _parse_base_events(root)
+
+
+def parse_xml(xml_content: bytes) -> list[dict]:
+    """Parse the XML content from the external API."""
+    try:
+        root = etree.fromstring(xml_content)
+    except etree.XMLSyntaxError as e:
+        logger.error(f"XML parsing error: {e}")
+        return []
+
+    return _parse_base_events(root)
+
+
+def _parse_base_events(root: etree._Element) -> list[dict]:
+    """Extract the online events of every `base_event` under root."""
+    events = []
+    for base_event_elem in root.xpath("//base_event"):
+        sell_mode = base_event_elem.get("sell_mode")
+        if sell_mode != "online":
+            continue
+
+        base_event_id = base_event_elem.get("base_event_id")
+        title = base_event_elem.get("title")
+
+        for event_elem in base_event_elem.xpath("./event"):
+            event_id = event_elem.get("event_id")
+            provider_unique_id = f"{base_event_id}_{event_id}"
+
+            try:
+                event_start_datetime = datetime.fromisoformat(
+                    event_elem.get("event_start_date")
+                )
+                event_end_datetime = datetime.fromisoformat(
+                    event_elem.get("event_end_date")
+                )
+            except ValueError as e:
+                logger.error(f"Parsing error: {e}")
+                continue  # Skip events with invalid dates
+
+            # Aggregate prices from zones
+            min_price = None
+            max_price = None
+            for zone_elem in event_elem.xpath("./zone"):
+                try:
+                    price = float(zone_elem.get("price", "0") or "0")
+                except ValueError as e:
+                    logger.error(f"Parsing error: {e}")
+                    price = 0.0
+                if min_price is None or price < min_price:
+                    min_price = price
+                if max_price is None or price > max_price:
+                    max_price = price
+
+            event_data = {
+                "provider_unique_id": provider_unique_id,
+                "provider_base_event_id": base_event_id,
+                "provider_event_id": event_id,
+                "title": title,
+                "start_date": event_start_datetime.date(),
+                "start_time": event_start_datetime.time(),
+                "end_date": event_end_datetime.date(),
+                "end_time": event_end_datetime.time(),
+                "min_price": min_price,
+                "max_price": max_price,
+            }
+            events.append(event_data)
+    return events
@@ -2,47 +2,96 @@
 
 import asyncio
 import logging
-from datetime import datetime
+import time
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+from typing import Iterator, Mapping, Sequence
 
 import httpx
-from lxml import etree
-from sqlalchemy.dialects.postgresql import insert
-from sqlalchemy.exc import SQLAlchemyError
 
-from app.core.config import settings
-from app.models.event import Event
+from app.core.config import get_settings
+from app.core.instrumentation import LoopLagMonitor, SamplingProfiler
+from app.db.notifications import notify_ingest
+from app.db.plans import analyze_events
+from app.repositories.postgres import PostgresEventRepository
+from app.tasks import ingest_runs
+from app.tasks.batching import AdaptiveBatcher
+from app.tasks.download import download_feed
+from app.tasks.feed_parser import parse_feed
 from app.worker import celery_app
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine  # isort: skip  # fmt: skip # noqa: E501
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine  # isort: skip  # fmt: skip # noqa: E501
 
 
 logger = logging.getLogger(__name__)
 
 
-async def _fetch_events(session_maker: async_sessionmaker) -> None:
-    """Asynchronous helper function to fetch events."""
+async def _fetch_events(
+    session_maker: async_sessionmaker, run_id: str | None = None
+) -> None:
+    """Asynchronous helper function to fetch events.
+
+    With a `run_id` the run is checkpointed after every committed batch and
+    its payload is spooled, so a retry of the same run resumes where the
+    previous attempt stopped, down to a download broken halfway.
+    """
     try:
         logger.info("Starting to fetch events from external API.")
         async with session_maker() as session:
-            # Fetch XML data
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    settings.EXTERNAL_API_URL,
-                    timeout=10,
+            repository = PostgresEventRepository(session)
+            xml_content = ingest_runs.load_payload(run_id) if run_id else None
+            if xml_content is not None:
+                logger.info(f"Reusing the payload spooled by run {run_id}.")
+            else:
+                # Fetch XML data
+                part_path = ingest_runs.part_path(run_id) if run_id else None
+                xml_content = await download_feed(
+                    get_settings().EXTERNAL_API_URL, part_path
                 )
-                response.raise_for_status()
-                xml_content = response.content
-                logger.info("Successfully fetched events from external API.")
+                logger.info("Successfully fetched events from the API.")
+                if run_id:
+                    ingest_runs.store_payload(run_id, xml_content)
 
             # Parse events
-            events = parse_xml(xml_content)
+            events = await parse_feed(xml_content)
             logger.info(f"Parsed {len(events)} events from XML.")
 
-            batch_size = 50
-            for i in range(0, len(events), batch_size):
-                batch = events[i : i + batch_size]  # noqa: E203
-                await upsert_events(batch, session)
+            offset = 0
+            if run_id:
+                digest = ingest_runs.payload_digest(xml_content)
+                run = await ingest_runs.start_run(session, run_id, digest)
+                offset, generation = run
+            else:
+                generation = await ingest_runs.next_generation(session)
+            if offset:
+                logger.info(f"Resuming run {run_id} from event {offset}.")
+
+            batcher = AdaptiveBatcher(row_parameters=repository.row_parameters)
+            for done, batch in batcher.batches(events, offset):
+                started = time.perf_counter()
+                await repository.upsert(batch, generation)
+                batcher.record(len(batch), time.perf_counter() - started)
                 logger.info(f"Upserted batch of {len(batch)} events.")
+                if run_id:
+                    await ingest_runs.save_checkpoint(session, run_id, done)
+
+            # Before finishing the run, so a retry notifies if this fails.
+            # A malformed or empty feed must not take every event offline
+            if events:
+                swept = await repository.sweep(generation)
+                logger.info(f"Took {len(swept)} missing events offline.")
+                written = len(events) - offset + len(swept)
+                await _analyze_if_large(session, written)
+                starts_on, ends_on = _date_span([*events, *swept])
+                notification = await notify_ingest(session, starts_on, ends_on)
+                logger.info(
+                    f"Notified dataset version {notification.version} "
+                    f"for {starts_on} to {ends_on}."
+                )
+
+            if run_id:
+                await ingest_runs.finish_runs(session)
 
     except httpx.RequestError as exc:
         logger.error(f"HTTP request error while fetching events: {exc}")
@@ -53,107 +102,71 @@ async def _fetch_events(session_maker: async_sessionmaker) -> None:
         raise
 
 
-def parse_xml(xml_content: bytes) -> list[dict]:
-    """Parse the XML content from the external API."""
-    try:
-        root = etree.fromstring(xml_content)
-    except etree.XMLSyntaxError as e:
-        logger.error(f"XML parsing error: {e}")
-        return []
-
-    events = []
-    for base_event_elem in root.xpath("//base_event"):
-        sell_mode = base_event_elem.get("sell_mode")
-        if sell_mode != "online":
-            continue
-
-        base_event_id = base_event_elem.get("base_event_id")
-        title = base_event_elem.get("title")
-
-        for event_elem in base_event_elem.xpath("./event"):
-            event_id = event_elem.get("event_id")
-            provider_unique_id = f"{base_event_id}_{event_id}"
-
-            try:
-                event_start_datetime = datetime.fromisoformat(
-                    event_elem.get("event_start_date")
-                )
-                event_end_datetime = datetime.fromisoformat(
-                    event_elem.get("event_end_date")
-                )
-            except ValueError as e:
-                logger.error(f"Parsing error: {e}")
-                continue  # Skip events with invalid dates
-
-            # Aggregate prices from zones
-            min_price = None
-            max_price = None
-            for zone_elem in event_elem.xpath("./zone"):
-                try:
-                    price = float(zone_elem.get("price", "0") or "0")
-                except ValueError as e:
-                    logger.error(f"Parsing error: {e}")
-                    price = 0.0
-                if min_price is None or price < min_price:
-                    min_price = price
-                if max_price is None or price > max_price:
-                    max_price = price
-
-            event_data = {
-                "provider_unique_id": provider_unique_id,
-                "provider_base_event_id": base_event_id,
-                "provider_event_id": event_id,
-                "title": title,
-                "start_date": event_start_datetime.date(),
-                "start_time": event_start_datetime.time(),
-                "end_date": event_end_datetime.date(),
-                "end_time": event_end_datetime.time(),
-                "min_price": min_price,
-                "max_price": max_price,
-            }
-            events.append(event_data)
-    return events
-
-
-async def upsert_events(events: list[dict], session: AsyncSession) -> None:
-    """Upsert events to the database using ON CONFLICT."""
-    if not events:
-        logger.info("No events to upsert.")
-        return
+async def _analyze_if_large(session: AsyncSession, written: int) -> None:
+    """Refresh the planner statistics after a large run.
+
+    Autovacuum analyzes `events` eventually, but until then the planner
+    sees the old row counts and may stop using the search indexes.
+    """
+    if written >= get_settings().INGEST_ANALYZE_THRESHOLD:
+        logger.info(f"Analyzing events after writing {written} of them.")
+        await analyze_events(session)
+
 
+def _date_span(events: Sequence[Mapping]) -> tuple[date, date]:
+    """First start date and last end date of the events."""
+    starts_on = min(event["start_date"] for event in events)
+    ends_on = max(event["end_date"] or event["start_date"] for event in events)
+    return starts_on, ends_on
+
+
+@contextmanager
+def _profiled(run_id: str) -> Iterator[None]:
+    """Profile the block into INGEST_SPOOL_DIR if INGEST_PROFILE is set."""
+    settings = get_settings()
+    if not settings.INGEST_PROFILE:
+        yield
+        return
+    profiler = SamplingProfiler()
     try:
-        stmt = insert(Event).values(events)
-        update_dict = {
-            c.name: getattr(stmt.excluded, c.name)
-            for c in Event.__table__.columns
-            if c.name != "id"
-        }
-        stmt = stmt.on_conflict_do_update(
-            index_elements=["provider_unique_id"],
-            set_=update_dict,
-        )
-
-        await session.execute(stmt)
-        await session.commit()
-    except SQLAlchemyError as e:
-        await session.rollback()
-        logger.error(f"Error saving events to the database: {e}")
-        raise
+        with profiler:
+            yield
+    finally:
+        path = Path(settings.INGEST_SPOOL_DIR) / f"{run_id}.folded"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(profiler.folded())
+        logger.info(f"Profile of run {run_id} written to {path}.")
+
+
+async def _run_ingest(engine: AsyncEngine, run_id: str) -> None:
+    """Run the ingest unless another run already holds the lock."""
+    async with ingest_runs.ingest_lock(engine) as acquired:
+        if not acquired:
+            logger.warning(f"Skipping run {run_id}: another run is ongoing.")
+            return
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with LoopLagMonitor("ingest"):
+            with _profiled(run_id):
+                await _fetch_events(session_maker, run_id)
 
 
 @celery_app.task(bind=True, max_retries=5)
 def fetch_events_task(self) -> None:
-    """Fetch events from the external API."""
+    """Fetch events from the external API.
+
+    Retries keep the task id, which is used as the run id to resume from
+    the last checkpoint.
+    """
     try:
         # Create a new event loop for this task
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
 
-        # Create a new async engine and session maker bound to this loop
-        engine = create_async_engine(settings.DATABASE_URL, echo=False)
-        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        # Create a new async engine bound to this loop
+        database_url = get_settings().DATABASE_URL
+        engine = create_async_engine(database_url, echo=False)
 
-        loop.run_until_complete(_fetch_events(session_maker))
+        loop.run_until_complete(_run_ingest(engine, self.request.id))
     except Exception as exc:
         logger.error(f"Error in fetch_events_task: {exc}")
         # Exponential backoff retry
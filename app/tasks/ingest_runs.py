@@ -0,0 +1,156 @@
+"""Checkpoints, cached payloads and locking of the ingest runs.
+
+An ingest run is identified by the id of its Celery task, which is kept
+across retries. The downloaded payload is spooled to disk and the offset of
+the last committed batch is recorded in `ingest_runs`, so a retry resumes
+from there instead of downloading and upserting everything again. The run
+also keeps its sync generation across retries, so the events upserted by
+every attempt are stamped alike.
+
+The checkpoint records the digest of the payload its offset counts events
+of. A retry that cannot find the spooled payload (another worker, a wiped
+spool) downloads the feed again, which may have changed since: it starts
+over from the first event, under a new sync generation.
+"""
+
+import hashlib
+import logging
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator
+
+from sqlalchemy import case, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.core.config import get_settings
+from app.models.ingest_run import IngestRun, sync_generation_seq
+from app.tasks.download import discard
+
+logger = logging.getLogger(__name__)
+
+# Key of the Postgres advisory lock held by the running ingest
+INGEST_LOCK_KEY = 7_203_115_001
+
+
+def _payload_path(run_id: str) -> Path:
+    return Path(get_settings().INGEST_SPOOL_DIR) / f"{run_id}.xml"
+
+
+def part_path(run_id: str) -> Path:
+    """Spool of the download of the run while it is incomplete."""
+    return Path(get_settings().INGEST_SPOOL_DIR) / f"{run_id}.part"
+
+
+def load_payload(run_id: str) -> bytes | None:
+    """Load the payload spooled by a previous attempt of the run."""
+    path = _payload_path(run_id)
+    if not path.exists():
+        return None
+    return path.read_bytes()
+
+
+def store_payload(run_id: str, payload: bytes) -> None:
+    """Spool the downloaded payload for later attempts of the run."""
+    path = _payload_path(run_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(payload)
+    tmp_path.replace(path)  # Never leave a truncated payload behind
+
+
+def payload_digest(payload: bytes) -> str:
+    """Digest identifying the payload of a checkpoint."""
+    return hashlib.sha256(payload).hexdigest()
+
+
+async def start_run(
+    session: AsyncSession,
+    run_id: str,
+    digest: str,
+) -> tuple[int, int]:
+    """Register the run if needed.
+
+    Returns the offset to resume from and the sync generation of the run.
+    A checkpoint of another payload than `digest` is reset, since its
+    offset does not count events of this one.
+    """
+    stmt = insert(IngestRun).values(
+        run_id=run_id,
+        next_offset=0,
+        payload_digest=digest,
+    )
+    changed = IngestRun.payload_digest.is_distinct_from(digest)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IngestRun.run_id],
+        set_={
+            "next_offset": case((changed, 0), else_=IngestRun.next_offset),
+            "sync_generation": case(
+                (changed, sync_generation_seq.next_value()),
+                else_=IngestRun.sync_generation,
+            ),
+            "payload_digest": digest,
+        },
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+    result = await session.execute(
+        select(IngestRun.next_offset, IngestRun.sync_generation).where(
+            IngestRun.run_id == run_id
+        )
+    )
+    return tuple(result.one())
+
+
+async def next_generation(session: AsyncSession) -> int:
+    """New sync generation, for a run without checkpoints."""
+    return await session.scalar(select(sync_generation_seq.next_value()))
+
+
+async def save_checkpoint(
+    session: AsyncSession,
+    run_id: str,
+    next_offset: int,
+) -> None:
+    """Record that the events before `next_offset` are committed."""
+    await session.execute(
+        update(IngestRun)
+        .where(IngestRun.run_id == run_id)
+        .values(next_offset=next_offset)
+    )
+    await session.commit()
+
+
+async def finish_runs(session: AsyncSession) -> None:
+    """Drop the checkpoints and payloads of every pending run.
+
+    Called once a run completes: older runs that are still waiting for a
+    retry must not resume on their stale payload, they start afresh.
+    """
+    stmt = delete(IngestRun).returning(IngestRun.run_id)
+    result = await session.execute(stmt)
+    await session.commit()
+    for run_id in result.scalars():
+        _payload_path(run_id).unlink(missing_ok=True)
+    # Runs that failed while downloading have no row, only a partial spool
+    for path in Path(get_settings().INGEST_SPOOL_DIR).glob("*.part"):
+        discard(path)
+
+
+@asynccontextmanager
+async def ingest_lock(engine: AsyncEngine) -> AsyncIterator[bool]:
+    """Hold the ingest advisory lock, yielding whether it was acquired.
+
+    The lock lives on its own connection, so Postgres releases it if the
+    worker dies mid-run.
+    """
+    async with engine.connect() as conn:
+        lock = func.pg_try_advisory_lock(INGEST_LOCK_KEY)
+        acquired = await conn.scalar(select(lock))
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                unlock = func.pg_advisory_unlock(INGEST_LOCK_KEY)
+                await conn.scalar(select(unlock))
@@ -0,0 +1,43 @@
+"""Scheduled sampling of the search plans."""
+
+import asyncio
+import logging
+
+from app.core.config import get_settings
+from app.db.plans import sample_search_plans
+from app.worker import celery_app
+
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine  # isort: skip  # fmt: skip # noqa: E501
+
+
+logger = logging.getLogger(__name__)
+
+
+async def _sample_plans(engine: AsyncEngine) -> None:
+    try:
+        session_maker = async_sessionmaker(engine, expire_on_commit=False)
+        async with session_maker() as session:
+            samples = await sample_search_plans(session)
+        flagged = [
+            sample.variant
+            for sample in samples
+            if sample.shape_changed or sample.buffers_regressed
+        ]
+        logger.info(f"Sampled {len(samples)} search plans.")
+        if flagged:
+            logger.warning(f"Search plans flagged for {', '.join(flagged)}.")
+    finally:
+        await engine.dispose()
+
+
+@celery_app.task
+def sample_search_plans_task() -> None:
+    """Explain the search variants and keep their plans."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        database_url = get_settings().DATABASE_URL
+        engine = create_async_engine(database_url, echo=False)
+        loop.run_until_complete(_sample_plans(engine))
+    finally:
+        loop.close()
@@ -2,7 +2,9 @@
 
 from celery import Celery
 
-from app.core.config import settings
+from app.core.config import get_settings
+
+settings = get_settings()
 
 celery_app = Celery(
     "worker",
@@ -19,6 +21,10 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.fetch_events.fetch_events_task",
         "schedule": float(settings.CELERY_FETCH_EVENTS_SCHEDULE),
     },
+    "sample-search-plans": {
+        "task": "app.tasks.sample_plans.sample_search_plans_task",
+        "schedule": float(settings.CELERY_PLAN_SAMPLE_SCHEDULE),
+    },
 }
 
 celery_app.conf.beat_schedule_filename = (
@@ -28,4 +34,9 @@ celery_app.conf.beat_scheduler = "celery.beat.PersistentScheduler"
 
 celery_app.conf.broker_connection_retry_on_startup = True
 
-celery_app.autodiscover_tasks(["app.tasks.fetch_events"])
+celery_app.autodiscover_tasks(
+    [
+        "app.tasks.fetch_events",
+        "app.tasks.sample_plans",
+    ]
+)
@@ -0,0 +1,66 @@
+"""Alembic environment, running the migrations over the asyncpg engine."""
+
+import asyncio
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import pool
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# Register every table and sequence on the metadata
+import app.db.notifications  # noqa: F401
+import app.models.event  # noqa: F401
+import app.models.ingest_run  # noqa: F401
+import app.models.plan_sample  # noqa: F401
+from app.core.config import get_settings
+from app.db.session import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+
+def get_url() -> str:
+    """Database URL, from `-x database_url=...` or the settings."""
+    url = context.get_x_argument(as_dictionary=True).get("database_url")
+    return url or str(get_settings().DATABASE_URL)
+
+
+def run_migrations_offline() -> None:
+    """Emit the migrations as SQL without connecting to the database."""
+    context.configure(
+        url=get_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def do_run_migrations(connection: Connection) -> None:
+    context.configure(connection=connection, target_metadata=target_metadata)
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+async def run_migrations_online() -> None:
+    """Run the migrations over a single connection."""
+    engine = create_async_engine(get_url(), poolclass=pool.NullPool)
+
+    async with engine.connect() as connection:
+        await connection.run_sync(do_run_migrations)
+
+    await engine.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    asyncio.run(run_migrations_online())
@@ -0,0 +1,52 @@
+"""Initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 14:19:23.624874
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: str | None = None
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    # The schema the application created with create_all before migrations
+    op.create_table(
+        "events",
+        sa.Column("id", sa.Uuid(), nullable=False),
+        sa.Column("provider_unique_id", sa.String(), nullable=False),
+        sa.Column("provider_base_event_id", sa.String(), nullable=False),
+        sa.Column("provider_event_id", sa.String(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("start_time", sa.Time(), nullable=True),
+        sa.Column("end_date", sa.Date(), nullable=True),
+        sa.Column("end_time", sa.Time(), nullable=True),
+        sa.Column("min_price", sa.Float(), nullable=True),
+        sa.Column("max_price", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("provider_unique_id"),
+    )
+    op.create_index(
+        "idx_date_range", "events", ["start_date", "end_date"], unique=False
+    )
+    op.create_index(
+        "idx_provider_ids",
+        "events",
+        ["provider_unique_id", "provider_base_event_id", "provider_event_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_provider_ids", table_name="events")
+    op.drop_index("idx_date_range", table_name="events")
+    op.drop_table("events")
@@ -0,0 +1,42 @@
+"""Event day summaries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 14:19:23.624874
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: str | None = "0001"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "event_day_summaries",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("event_count", sa.Integer(), nullable=False),
+        sa.Column("min_price", sa.Float(), nullable=True),
+        sa.Column("max_price", sa.Float(), nullable=True),
+        sa.PrimaryKeyConstraint("day"),
+    )
+    # Summarize the events already there
+    op.execute(
+        """
+        INSERT INTO event_day_summaries
+            (day, event_count, min_price, max_price)
+        SELECT start_date, count(*), min(min_price), max(max_price)
+        FROM events
+        GROUP BY start_date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("event_day_summaries")
@@ -0,0 +1,37 @@
+"""Date range price index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 14:19:23.624874
+"""
+
+from typing import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: str | None = "0002"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+DATE_RANGE_PRICE = ["start_date", "end_date", "min_price", "max_price"]
+DATE_RANGE_PRICE_INCLUDE = ["id", "title", "start_time", "end_time"]
+
+
+def upgrade() -> None:
+    op.create_index(
+        "idx_date_range_price",
+        "events",
+        DATE_RANGE_PRICE,
+        unique=False,
+        postgresql_include=DATE_RANGE_PRICE_INCLUDE,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "idx_date_range_price",
+        table_name="events",
+        postgresql_include=DATE_RANGE_PRICE_INCLUDE,
+    )
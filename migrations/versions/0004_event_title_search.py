@@ -0,0 +1,48 @@
+"""Event title search
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 14:19:23.624874
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: str | None = "0003"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+TITLE_SEARCH = "to_tsvector('simple', coalesce(title, ''))"
+
+
+def upgrade() -> None:
+    op.add_column(
+        "events",
+        sa.Column(
+            "title_search",
+            postgresql.TSVECTOR(),
+            sa.Computed(TITLE_SEARCH, persisted=True),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "idx_title_search",
+        "events",
+        ["title_search"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "idx_title_search",
+        table_name="events",
+        postgresql_using="gin",
+    )
+    op.drop_column("events", "title_search")
@@ -0,0 +1,36 @@
+"""Ingest runs
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 14:19:23.624874
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: str | None = "0004"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingest_runs",
+        sa.Column("run_id", sa.String(), nullable=False),
+        sa.Column("next_offset", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("run_id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ingest_runs")
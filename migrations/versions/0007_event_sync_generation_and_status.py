@@ -0,0 +1,98 @@
+"""Event sync generation and status
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 14:37:50.017127
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: str | None = "0006"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+ONLINE_ONLY = sa.text("status = 'online'")
+DATE_RANGE_PRICE = ["start_date", "end_date", "min_price", "max_price"]
+DATE_RANGE_PRICE_INCLUDE = ["id", "title", "start_time", "end_time"]
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence("sync_generation_seq")))
+    op.add_column(
+        "events",
+        sa.Column(
+            "sync_generation",
+            sa.BigInteger(),
+            server_default="0",
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "events",
+        sa.Column(
+            "status",
+            sa.String(),
+            server_default="online",
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "idx_online_generation",
+        "events",
+        ["sync_generation"],
+        unique=False,
+        postgresql_where=ONLINE_ONLY,
+    )
+    # The search index now only holds the online events
+    op.drop_index(
+        "idx_date_range_price",
+        table_name="events",
+        postgresql_include=DATE_RANGE_PRICE_INCLUDE,
+    )
+    op.create_index(
+        "idx_date_range_price",
+        "events",
+        DATE_RANGE_PRICE,
+        unique=False,
+        postgresql_include=DATE_RANGE_PRICE_INCLUDE,
+        postgresql_where=ONLINE_ONLY,
+    )
+    op.add_column(
+        "ingest_runs",
+        sa.Column(
+            "sync_generation",
+            sa.BigInteger(),
+            server_default=sa.text("nextval('sync_generation_seq')"),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("ingest_runs", "sync_generation")
+    op.drop_index(
+        "idx_date_range_price",
+        table_name="events",
+        postgresql_include=DATE_RANGE_PRICE_INCLUDE,
+        postgresql_where=ONLINE_ONLY,
+    )
+    op.create_index(
+        "idx_date_range_price",
+        "events",
+        DATE_RANGE_PRICE,
+        unique=False,
+        postgresql_include=DATE_RANGE_PRICE_INCLUDE,
+    )
+    op.drop_index(
+        "idx_online_generation",
+        table_name="events",
+        postgresql_where=ONLINE_ONLY,
+    )
+    op.drop_column("events", "status")
+    op.drop_column("events", "sync_generation")
+    op.execute(sa.schema.DropSequence(sa.Sequence("sync_generation_seq")))
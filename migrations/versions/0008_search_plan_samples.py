@@ -0,0 +1,63 @@
+"""Search plan samples
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 14:47:45.732650
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: str | None = "0007"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "search_plan_samples",
+        sa.Column(
+            "id",
+            sa.BigInteger(),
+            sa.Identity(always=False),
+            nullable=False,
+        ),
+        sa.Column("variant", sa.String(), nullable=False),
+        sa.Column(
+            "captured_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column("shape", sa.String(), nullable=False),
+        sa.Column(
+            "plan",
+            postgresql.JSONB(astext_type=sa.Text()),
+            nullable=False,
+        ),
+        sa.Column("execution_ms", sa.Float(), nullable=False),
+        sa.Column("shared_hit_blocks", sa.Integer(), nullable=False),
+        sa.Column("shared_read_blocks", sa.Integer(), nullable=False),
+        sa.Column("shape_changed", sa.Boolean(), nullable=False),
+        sa.Column("buffers_regressed", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "idx_plan_samples_variant",
+        "search_plan_samples",
+        ["variant", "captured_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "idx_plan_samples_variant",
+        table_name="search_plan_samples",
+    )
+    op.drop_table("search_plan_samples")
@@ -0,0 +1,28 @@
+"""Ingest run payload digest
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 15:24:03.582998
+"""
+
+from typing import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: str | None = "0008"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "ingest_runs",
+        sa.Column("payload_digest", sa.String(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("ingest_runs", "payload_digest")
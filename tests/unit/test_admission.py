@@ -0,0 +1,135 @@
+"""Unit tests for the admission control."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import get_settings
+
+from app.core.admission import MEMORY_MAX_CONCURRENCY, AdmissionController, TokenBucket, get_search_admission  # isort: skip  # fmt: skip # noqa: E501
+
+
+async def _hold(admission: AdmissionController, release: asyncio.Event):
+    async with admission.admit():
+        await release.wait()
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_admission_caps_concurrency():
+    """Test no more than max_concurrency requests run at once."""
+    admission = AdmissionController(
+        max_concurrency=2, max_queue=10, queue_timeout=5, retry_after=1
+    )
+    running = 0
+    peak = 0
+
+    async def search():
+        nonlocal running, peak
+        async with admission.admit():
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    await asyncio.gather(*(search() for _ in range(8)))
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_admission_rejects_when_queue_is_full():
+    """Test requests beyond the wait queue fail fast with 503."""
+    admission = AdmissionController(
+        max_concurrency=1, max_queue=1, queue_timeout=5, retry_after=3
+    )
+    release = asyncio.Event()
+    holders = [asyncio.create_task(_hold(admission, release)) for _ in "ab"]
+    await asyncio.sleep(0)  # One runs, the other one waits
+
+    with pytest.raises(HTTPException) as exc_info:
+        async with admission.admit():
+            pass
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "3"}
+
+    release.set()
+    await asyncio.gather(*holders)
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_admission_rejects_after_queue_timeout():
+    """Test a request waiting longer than queue_timeout is rejected."""
+    admission = AdmissionController(
+        max_concurrency=1, max_queue=10, queue_timeout=0.01, retry_after=1
+    )
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(admission, release))
+    await asyncio.sleep(0)
+
+    with pytest.raises(HTTPException) as exc_info:
+        async with admission.admit():
+            pass
+
+    assert exc_info.value.status_code == 503
+
+    release.set()
+    await holder
+    async with admission.admit():
+        pass  # The slot was not leaked by the rejected request
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_admission_rate_limits_each_client():
+    """Test a client over its token bucket is rejected with 429."""
+    admission = AdmissionController(
+        max_concurrency=10,
+        max_queue=10,
+        queue_timeout=1,
+        retry_after=1,
+        rate_limit=0.5,
+        rate_limit_burst=2,
+    )
+
+    for _ in range(2):
+        async with admission.admit("10.0.0.1"):
+            pass
+
+    with pytest.raises(HTTPException) as exc_info:
+        async with admission.admit("10.0.0.1"):
+            pass
+
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.headers == {"Retry-After": "2"}
+
+    async with admission.admit("10.0.0.2"):
+        pass  # Other clients keep their own budget
+
+
+def test_token_bucket_refills_over_time():
+    """Test the bucket refills at its rate up to the burst."""
+    bucket = TokenBucket(rate=10, burst=1)
+
+    assert bucket.take() == 0
+    assert bucket.take() > 0
+
+    bucket.updated_at -= 1  # A second later
+
+    assert bucket.take() == 0
+    assert bucket.tokens < 1
+
+
+def test_admission_of_the_memory_repository_needs_no_database():
+    """Test the memory repository limits searches without an engine."""
+    settings = get_settings()
+    with (
+        patch.object(settings, "EVENT_REPOSITORY", "memory"),
+        patch.object(settings, "SEARCH_MAX_CONCURRENCY", None),
+        patch("app.core.admission.get_engine") as get_engine,
+    ):
+        admission = get_search_admission.__wrapped__()
+
+    get_engine.assert_not_called()
+    assert admission.max_concurrency == MEMORY_MAX_CONCURRENCY
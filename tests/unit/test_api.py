@@ -1,11 +1,23 @@
 """Unit tests for the API."""
 
+import asyncio
+import subprocess
+import sys
 from datetime import datetime, timezone
+from unittest.mock import patch
 from uuid import UUID
 
+import pyarrow as pa
 import pytest
+from httpx import AsyncClient
 
-from app.schemas.event import EventList, EventSummary, SearchSuccessResponse
+from app.api.encoders import ARROW_STREAM
+from app.core.admission import AdmissionController
+from app.core.config import get_settings
+from app.main import app, lifespan
+from app.repositories.memory import InMemoryEventRepository
+
+from app.schemas.event import DayFacet, DayFacetList, EventList, EventSummary, FacetsSuccessResponse, SearchSuccessResponse  # isort: skip  # fmt: skip # noqa: E501
 
 
 @pytest.mark.asyncio
@@ -100,3 +112,170 @@ async def test_search_events_invalid_date_format(client):
 
     assert "data" in data
     assert "error" in data
+
+
+@pytest.mark.asyncio
+async def test_get_facets_success(client, event_service):
+    """Test successful facets request."""
+
+    mock_response = FacetsSuccessResponse(
+        data=DayFacetList(
+            days=[
+                DayFacet(
+                    day=datetime(2023, 1, 1).date(),
+                    event_count=3,
+                    min_price=10.0,
+                    max_price=20.0,
+                )
+            ]
+        )
+    )
+
+    async def mock_get_day_facets(*args):
+        return mock_response
+
+    event_service.get_day_facets = mock_get_day_facets
+
+    response = await client.get(
+        "/facets?starts_at=2023-01-01T00:00:00Z&ends_at=2023-01-31T23:59:59Z"
+    )
+
+    assert response.status_code == 200
+
+    data = response.json()
+
+    assert data["data"]["days"][0]["event_count"] == 3
+
+
+@pytest.mark.asyncio
+async def test_search_events_overloaded(client, event_service):
+    """Test searches over the admission limits are shed with 503."""
+
+    async def mock_search(*args):
+        await asyncio.sleep(0.1)
+        return SearchSuccessResponse(data=EventList(events=[]))
+
+    event_service.search_events = mock_search
+    admission = AdmissionController(
+        max_concurrency=1, max_queue=0, queue_timeout=1, retry_after=2
+    )
+
+    url = "/search?starts_at=2023-01-01T00:00:00Z&ends_at=2023-12-31T00:00:00Z"
+    with patch("app.api.routes.get_search_admission", return_value=admission):
+        admitted, shed = await asyncio.gather(client.get(url), client.get(url))
+
+    assert admitted.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "2"
+    assert shed.json()["error"]["code"] == "503"
+
+    response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'search_rejected_total{reason="queue_full"}' in response.text
+
+
+@pytest.mark.asyncio
+async def test_profile_requires_the_token(client):
+    """Test the profiler is off without a token and checks the token."""
+
+    response = await client.get("/debug/profile?seconds=0.01")
+
+    assert response.status_code == 404
+
+    with patch.object(get_settings(), "PROFILER_TOKEN", "secret"):
+        response = await client.get(
+            "/debug/profile?seconds=0.01",
+            headers={"X-Profiler-Token": "guess"},
+        )
+
+        assert response.status_code == 403
+
+        response = await client.get(
+            "/debug/profile?seconds=0.05",
+            headers={"X-Profiler-Token": "secret"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+
+
+@pytest.mark.asyncio
+async def test_search_events_arrow(client, event_service):
+    """Test the Accept header selects the Arrow IPC encoding."""
+
+    row = (
+        UUID("a7a9d2f8-e3d3-4b2a-b8c9-f1d4e6a7b8c9"),
+        "Test Event",
+        datetime(2023, 1, 1).date(),
+        None,
+        None,
+        None,
+        10.0,
+        20.0,
+    )
+
+    async def mock_search_rows(*args):
+        return [row]
+
+    event_service.search_rows = mock_search_rows
+
+    response = await client.get(
+        "/search?starts_at=2023-01-01T00:00:00Z&ends_at=2023-12-31T23:59:59Z",
+        headers={"Accept": "application/vnd.apache.arrow.stream"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == ARROW_STREAM
+    assert response.headers["vary"] == "Accept"
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("title").to_pylist() == ["Test Event"]
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_memory_repository_serves_a_snapshot(tmp_path):
+    """Test a deployment without database searches its feed snapshot."""
+
+    snapshot = tmp_path / "feed.xml"
+    snapshot.write_bytes(
+        b'<planList><output><base_event base_event_id="1" title="Snapshot"'
+        b' sell_mode="online"><event event_id="1"'
+        b' event_start_date="2023-05-01T20:00:00"'
+        b' event_end_date="2023-05-01T22:00:00"><zone price="12.0" />'
+        b"</event></base_event></output></planList>"
+    )
+    settings = get_settings()
+    repository = InMemoryEventRepository()
+
+    with (
+        patch.object(settings, "EVENT_REPOSITORY", "memory"),
+        patch.object(settings, "EVENT_SNAPSHOT_PATH", str(snapshot)),
+        patch("app.main.get_memory_repository", lambda: repository),
+        patch("app.dependencies.get_memory_repository", lambda: repository),
+    ):
+        async with lifespan(app):
+            async with AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get(
+                    "/search?starts_at=2023-05-01T00:00:00Z"
+                    "&ends_at=2023-05-31T00:00:00Z"
+                )
+
+    assert response.status_code == 200
+    assert response.json()["data"]["events"][0]["title"] == "Snapshot"
+
+
+def test_app_does_not_import_the_worker():
+    """Test the API loads without the Celery app and the ingest task."""
+    code = (
+        "import sys, app.main; "
+        "print(sorted({'celery', 'app.worker', 'app.tasks.fetch_events'} "
+        "& sys.modules.keys()))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    assert result.stdout.strip() == "[]"
@@ -0,0 +1,111 @@
+"""Unit tests for the worker-local search cache."""
+
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.core.cache import SearchCache, serialized_size
+from app.db.notifications import IngestNotification
+from app.repositories.base import EventQuery, EventRow
+from app.schemas.event import SearchErrorResponse
+
+
+def _rows(title: str) -> list[EventRow]:
+    day = date(2024, 5, 1)
+    return [EventRow(uuid4(), title, day, None, day, None, 10.0, 20.0)]
+
+
+def _query(day: int, last_day: int | None = None) -> EventQuery:
+    return EventQuery(date(2024, 5, day), date(2024, 5, last_day or day))
+
+
+def test_cache_evicts_least_recently_used_by_size():
+    """Test entries are evicted by serialized size, oldest read first."""
+    rows = {day: _rows(f"Event {day}") for day in (1, 2, 3)}
+    sizes = {day: serialized_size(rows[day]) for day in rows}
+    cache = SearchCache(max_bytes=2 * max(sizes.values()), ttl=60.0)
+
+    cache.put(_query(1), rows[1], None)
+    cache.put(_query(2), rows[2], None)
+    assert cache.get(_query(1)) == tuple(rows[1])
+    cache.put(_query(3), rows[3], None)
+
+    assert cache.get(_query(2)) is None
+    assert cache.get(_query(1)) == tuple(rows[1])
+    assert cache.bytes_in_use == sizes[1] + sizes[3]
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["hit_rate"] == 2 / 3
+
+    large = [row for i in range(3) for row in _rows(f"Large event {i}")]
+    cache.put(_query(4), large, None)  # Larger than the whole cache
+    assert len(cache) == 2
+
+
+def test_cache_expires_entries():
+    """Test entries expire with their TTL."""
+    cache = SearchCache(1024, ttl=60.0)
+    cache.put(_query(1), [], None)
+    assert cache.get(_query(1)) == ()
+
+    with patch("app.core.cache.time.monotonic", return_value=1e12):
+        assert cache.get(_query(1)) is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.bytes_in_use == 0
+
+
+def test_cache_evicts_the_dates_touched_by_an_ingest():
+    """Test an ingest only evicts the queries overlapping its dates."""
+    cache = SearchCache(4096, ttl=60.0)
+    cache.on_ingest(IngestNotification(1, date(2024, 1, 1), date(2024, 1, 2)))
+    for query in (_query(1, 3), _query(5, 9), _query(10, 20)):
+        cache.put(query, [], 1)
+
+    cache.on_ingest(IngestNotification(2, date(2024, 5, 8), date(2024, 5, 9)))
+
+    assert cache.get(_query(1, 3)) == ()
+    assert cache.get(_query(5, 9)) is None
+    assert cache.get(_query(10, 20)) == ()
+    # Rows searched before the ingest are not cached after it
+    cache.put(_query(5, 9), [], 1)
+    assert cache.get(_query(5, 9)) is None
+
+    # Notifications 3 and 4 were missed, their dates are unknown
+    cache.on_ingest(IngestNotification(5, date(2024, 1, 1), date(2024, 1, 2)))
+    assert len(cache) == 0
+    assert cache.stats()["invalidations"] == 3
+
+
+@pytest.mark.asyncio
+async def test_search_caches_empty_results(
+    memory_repository, event_service, search_cache
+):
+    """Test an empty range is searched once, then served by the cache."""
+    memory_repository.search = AsyncMock(return_value=[])
+
+    for hour in (8, 20):  # Both normalize to the same day pair
+        response = await event_service.search_events(
+            memory_repository,
+            datetime(2024, 5, 1, hour, tzinfo=timezone.utc),
+            datetime(2024, 5, 2, tzinfo=timezone.utc),
+        )
+        assert isinstance(response, SearchErrorResponse)
+        assert response.error.code == "404"
+
+    memory_repository.search.assert_called_once()
+    assert search_cache.stats()["hits"] >= 1
+
+
+@pytest.mark.asyncio
+async def test_cache_stats_endpoint(client, search_cache):
+    """Test the stats of the search cache are exposed."""
+    search_cache.put(_query(1), _rows("Event"), None)
+
+    response = await client.get("/debug/cache")
+
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["entries"] == 1
+    assert stats["bytes_in_use"] == search_cache.bytes_in_use
+    assert {"hit_rate", "evictions", "max_bytes"} <= stats.keys()
@@ -0,0 +1,131 @@
+"""Unit tests for the compressed and resumable feed download."""
+
+import gzip
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import brotli
+import httpx
+import pytest
+
+from app.core.config import get_settings
+from app.tasks.download import DownloadError, download_feed
+
+FEED = b"<root>" + b'<base_event title="Concert" />' * 5000 + b"</root>"
+
+ENCODERS = {
+    "identity": lambda body: body,
+    "gzip": gzip.compress,
+    "br": brotli.compress,
+    "truncated": lambda body: gzip.compress(body)[:-100],
+}
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """Stand-in for the provider, honouring Range with If-Range."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        body = ENCODERS[server.encoding](server.feed)
+
+        start = 0
+        requested = self.headers.get("Range")
+        if requested and self.headers.get("If-Range") == server.etag:
+            start = int(requested.removeprefix("bytes=").rstrip("-"))
+        self.send_response(206 if start else 200)
+        if server.encoding != "identity":
+            encoding = server.encoding.replace("truncated", "gzip")
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(body) - start))
+        if start:
+            span = f"{start}-{len(body) - 1}/{len(body)}"
+            self.send_header("Content-Range", f"bytes {span}")
+        self.end_headers()
+
+        if server.cut_after:
+            # Break the connection halfway through the body
+            self.wfile.write(body[start:][: server.cut_after])
+            server.cut_after = None
+            self.close_connection = True
+            return
+        self.wfile.write(body[start:])
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def feed_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+    server.feed = FEED
+    server.encoding = "gzip"
+    server.etag = '"v1"'
+    server.cut_after = None
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_port}/feed"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip", "br"])
+@pytest.mark.asyncio(scope="function")
+async def test_download_decodes_the_feed(feed_server, tmp_path, encoding):
+    """Test the feed is negotiated compressed and decoded."""
+    feed_server.encoding = encoding
+    part_path = tmp_path / "run.part"
+
+    assert await download_feed(feed_server.url, part_path) == FEED
+
+    assert feed_server.requests[0]["Accept-Encoding"] == "br, gzip"
+    assert list(tmp_path.iterdir()) == []  # The spool is discarded
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_download_resumes_a_broken_transfer(feed_server, tmp_path):
+    """Test a broken transfer asks for the missing bytes only."""
+    feed_server.cut_after = 100
+
+    assert await download_feed(feed_server.url, tmp_path / "run.part") == FEED
+
+    first, retry = feed_server.requests
+    assert "Range" not in first
+    assert retry["Range"] == "bytes=100-"
+    assert retry["If-Range"] == '"v1"'
+    assert retry["Accept-Encoding"] == "gzip"
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_download_restarts_when_the_feed_changed(feed_server, tmp_path):
+    """Test a spool of an older feed is replaced by the full new one."""
+    part_path = tmp_path / "run.part"
+    feed_server.cut_after = 100
+    with patch.object(get_settings(), "DOWNLOAD_ATTEMPTS", 1):
+        with pytest.raises(httpx.TransportError):
+            await download_feed(feed_server.url, part_path)
+
+    assert part_path.stat().st_size == 100  # Left for the next task attempt
+
+    feed_server.feed = FEED.replace(b"Concert", b"Theatre")
+    feed_server.etag = '"v2"'
+
+    assert await download_feed(feed_server.url, part_path) == feed_server.feed
+
+    assert feed_server.requests[-1]["If-Range"] == '"v1"'
+    assert not part_path.exists()
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_download_rejects_a_truncated_stream(feed_server, tmp_path):
+    """Test a compressed body cut short by the server is an error."""
+    feed_server.encoding = "truncated"
+
+    with pytest.raises(DownloadError):
+        await download_feed(feed_server.url, tmp_path / "run.part")
+
+    assert list(tmp_path.iterdir()) == []
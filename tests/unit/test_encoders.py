@@ -0,0 +1,94 @@
+"""Unit tests for the binary encodings of the search results."""
+
+from datetime import date, time
+from uuid import UUID
+
+import msgpack
+import pyarrow as pa
+
+from app.repositories.base import SUMMARY_FIELDS, EventRow
+
+from app.api.encoders import ARROW_STREAM, JSON, MSGPACK, encode_arrow, encode_msgpack, negotiate  # isort: skip  # fmt: skip # noqa: E501
+
+ROWS = [
+    EventRow(
+        id=UUID("a7a9d2f8-e3d3-4b2a-b8c9-f1d4e6a7b8c9"),
+        title="Rock concert",
+        start_date=date(2024, 3, 1),
+        start_time=time(20, 30),
+        end_date=date(2024, 3, 2),
+        end_time=time(1, 0, 0, 500),
+        min_price=15.5,
+        max_price=40.0,
+    ),
+    EventRow(
+        id=UUID("00000000-0000-0000-0000-000000000001"),
+        title="Open air cinema",
+        start_date=date(2024, 3, 3),
+        start_time=None,
+        end_date=None,
+        end_time=None,
+        min_price=None,
+        max_price=None,
+    ),
+]
+
+
+def test_negotiate():
+    """Test the preferred accepted media type is picked."""
+    assert negotiate(None) == JSON
+    assert negotiate("*/*") == JSON
+    assert negotiate("text/html") == JSON
+    assert negotiate("application/msgpack") == MSGPACK
+    assert negotiate("application/x-msgpack, */*;q=0.1") == MSGPACK
+    assert negotiate(f"application/json;q=0.5, {ARROW_STREAM}") == ARROW_STREAM
+    assert negotiate(f"{ARROW_STREAM};q=0, application/json") == JSON
+
+
+def test_encode_msgpack():
+    """Test the events are packed with typed ids, dates and times."""
+    response = msgpack.unpackb(encode_msgpack(ROWS))
+
+    assert response["error"] is None
+    first, second = response["data"]["events"]
+    assert first == {
+        "id": ROWS[0].id.bytes,
+        "title": "Rock concert",
+        "start_date": (date(2024, 3, 1) - date(1970, 1, 1)).days,
+        "start_time": (20 * 3600 + 30 * 60) * 1_000_000,
+        "end_date": (date(2024, 3, 2) - date(1970, 1, 1)).days,
+        "end_time": 3600 * 1_000_000 + 500,
+        "min_price": 15.5,
+        "max_price": 40.0,
+    }
+    assert second["start_time"] is None
+    assert second["min_price"] is None
+
+
+def test_encode_msgpack_no_results():
+    """Test an empty search is packed like the JSON error response."""
+    response = msgpack.unpackb(encode_msgpack([]))
+
+    assert response["data"] is None
+    assert response["error"]["code"] == "404"
+
+
+def test_encode_arrow():
+    """Test the events are streamed as typed Arrow columns."""
+    table = pa.ipc.open_stream(encode_arrow(ROWS)).read_all()
+
+    assert table.schema.field("id").type == pa.binary(16)
+    assert table.schema.field("start_date").type == pa.date32()
+    assert table.schema.field("start_time").type == pa.time64("us")
+    assert table.schema.field("min_price").type == pa.float64()
+    assert table.column("id").to_pylist() == [row.id.bytes for row in ROWS]
+    assert table.to_pylist()[0] | {"id": ROWS[0].id} == ROWS[0]._asdict()
+    assert table.to_pylist()[1]["end_time"] is None
+
+
+def test_encode_arrow_no_results():
+    """Test an empty search is a stream with the schema and no rows."""
+    table = pa.ipc.open_stream(encode_arrow([])).read_all()
+
+    assert table.num_rows == 0
+    assert table.schema.names == list(SUMMARY_FIELDS)
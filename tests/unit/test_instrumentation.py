@@ -0,0 +1,49 @@
+"""Unit tests for the event loop and profiling instrumentation."""
+
+import asyncio
+import logging
+import time
+
+import pytest
+
+from app.core.instrumentation import LoopLagMonitor, SamplingProfiler, loop_stalls_total  # isort: skip  # fmt: skip # noqa: E501
+
+
+def _block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def _spin(seconds: float) -> None:
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        pass
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_loop_lag_monitor_logs_the_blocking_stack(caplog):
+    """Test a blocked loop is counted and its blocking frame logged."""
+    stalls = loop_stalls_total.value(loop="test")
+
+    with caplog.at_level(logging.WARNING, "app.core.instrumentation"):
+        async with LoopLagMonitor("test", interval=0.02, threshold=0.05):
+            await asyncio.sleep(0.05)
+            _block_the_loop(0.3)
+            await asyncio.sleep(0.05)
+
+    assert loop_stalls_total.value(loop="test") == stalls + 1
+    blocked = [r.message for r in caplog.records if "blocked" in r.message]
+    assert len(blocked) == 1
+    assert "_block_the_loop" in blocked[0]
+
+
+def test_sampling_profiler_folds_the_stacks():
+    """Test the samples of the profiled thread are folded by stack."""
+    with SamplingProfiler(interval=0.001) as profiler:
+        _spin(0.1)
+
+    folded = profiler.folded().splitlines()
+
+    assert folded
+    stack, count = folded[0].rsplit(" ", 1)
+    assert stack.endswith(f"{__name__}:_spin")
+    assert int(count) > 10
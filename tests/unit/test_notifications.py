@@ -0,0 +1,60 @@
+"""Unit tests for the ingest notifications."""
+
+import asyncio
+from datetime import date
+
+import pytest
+
+from app.db.notifications import IngestListener, IngestNotification, notify_ingest  # isort: skip  # fmt: skip # noqa: E501
+
+
+def test_notification_payload_round_trip():
+    """Test a notification survives its NOTIFY payload encoding."""
+    notification = IngestNotification(3, date(2024, 1, 1), date(2024, 2, 1))
+
+    payload = notification.to_payload()
+
+    assert IngestNotification.from_payload(payload) == notification
+
+
+def test_listener_drops_stale_versions():
+    """Test the listener only hands newer dataset versions over."""
+    listener = IngestListener()
+    received = []
+    listener.subscribe(received.append)
+
+    for version in (2, 1, 2, 3):
+        payload = IngestNotification(
+            version, date(2024, 1, 1), date(2024, 1, 2)
+        ).to_payload()
+        listener._on_notification(None, 0, "events_ingested", payload)
+    listener._on_notification(None, 0, "events_ingested", "not json")
+
+    assert [notification.version for notification in received] == [2, 3]
+    assert listener.version == 3
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_listener_receives_ingest_notifications(
+    session_maker, test_engine, prepare_database
+):
+    """Test a committed ingest notification reaches the listener."""
+    database_url = test_engine.url.render_as_string(hide_password=False)
+    listener = IngestListener(database_url)
+    received = asyncio.Queue()
+    listener.subscribe(received.put_nowait)
+
+    await listener.start()
+    try:
+        await asyncio.wait_for(listener.listening.wait(), timeout=5)
+
+        async with session_maker() as session:
+            starts_on, ends_on = date(2024, 1, 1), date(2024, 3, 31)
+            sent = await notify_ingest(session, starts_on, ends_on)
+
+        notification = await asyncio.wait_for(received.get(), timeout=5)
+    finally:
+        await listener.stop()
+
+    assert notification == sent
+    assert listener.version == sent.version
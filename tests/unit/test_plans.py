@@ -0,0 +1,118 @@
+"""Unit tests for the search plan sampling."""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import get_settings
+from app.models.plan_sample import SearchPlanSample
+from app.tasks.sample_plans import _sample_plans
+
+from app.db.plans import SEARCH_VARIANTS, _buffers_regressed, plan_shape, sample_search_plans  # isort: skip  # fmt: skip # noqa: E501
+
+
+def _sample(shape: str, hit: int, read: int = 0) -> SearchPlanSample:
+    return SearchPlanSample(
+        variant="date range",
+        shape=shape,
+        plan={},
+        execution_ms=1.0,
+        shared_hit_blocks=hit,
+        shared_read_blocks=read,
+        shape_changed=False,
+        buffers_regressed=False,
+    )
+
+
+def test_plan_shape():
+    """Test the shape keeps node types and scans, not the costs."""
+    plan = {
+        "Node Type": "Limit",
+        "Total Cost": 12.5,
+        "Plans": [
+            {
+                "Node Type": "Sort",
+                "Plans": [
+                    {
+                        "Node Type": "Index Only Scan",
+                        "Index Name": "idx_date_range_price",
+                        "Relation Name": "events",
+                        "Actual Rows": 183,
+                    },
+                    {"Node Type": "Seq Scan", "Relation Name": "events"},
+                ],
+            }
+        ],
+    }
+
+    assert plan_shape(plan) == (
+        "Limit (Sort (Index Only Scan using idx_date_range_price, "
+        "Seq Scan on events))"
+    )
+
+
+def test_buffers_regressed():
+    """Test buffer regressions need both the ratio and the floor."""
+    previous = _sample("Seq Scan on events", hit=100, read=50)
+
+    with patch.object(get_settings(), "PLAN_BUFFER_REGRESSION_RATIO", 2.0):
+        assert _buffers_regressed(previous, _sample("", hit=200, read=101))
+        assert not _buffers_regressed(previous, _sample("", hit=300))
+        # Below the floor, doubling a handful of blocks is noise
+        small = _sample("", hit=2)
+        assert not _buffers_regressed(small, _sample("", hit=40))
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_sample_search_plans(session_maker, prepare_database, caplog):
+    """Test every variant is sampled and a changed shape is flagged."""
+    captured_long_ago = datetime.now(timezone.utc) - timedelta(days=365)
+    async with session_maker() as session:
+        session.add(_sample("Result", hit=1))
+        expired = _sample("Result", hit=1)
+        expired.variant = "expired"
+        expired.captured_at = captured_long_ago
+        session.add(expired)
+        await session.commit()
+
+        with caplog.at_level(logging.WARNING, logger="app.db.plans"):
+            samples = await sample_search_plans(session)
+
+        by_variant = {sample.variant: sample for sample in samples}
+        assert list(by_variant) == list(SEARCH_VARIANTS)
+        assert by_variant["date range"].shape_changed
+        assert "Plan of search 'date range' changed" in caplog.text
+
+        counts = await session.execute(
+            select(SearchPlanSample.variant, func.count()).group_by(
+                SearchPlanSample.variant
+            )
+        )
+        counts = dict(counts.all())
+        assert counts["date range"] == 2
+        assert "expired" not in counts  # Past the retention
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_sample_plans_task(
+    session_maker,
+    test_engine,
+    prepare_database,
+    caplog,
+):
+    """Test the scheduled task logs the variants whose plan is flagged."""
+    async with session_maker() as session:
+        session.add(_sample("Result", hit=1))
+        await session.commit()
+
+    # The task disposes of its engine
+    engine = create_async_engine(test_engine.url)
+    with caplog.at_level(logging.INFO, logger="app.tasks.sample_plans"):
+        await _sample_plans(engine)
+
+    assert f"Sampled {len(SEARCH_VARIANTS)} search plans." in caplog.text
+    assert "Search plans flagged for date range." in caplog.text
@@ -0,0 +1,106 @@
+"""Unit tests for the production server."""
+
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.db.session import worker_pool_size
+from app.server import Supervisor
+
+
+def _serve(ready):
+    """Worker that is ready at once and serves until terminated."""
+    ready.set()
+    time.sleep(60)
+
+
+def _exit_at_once(ready):
+    """Worker that is recycled right after starting."""
+    ready.set()
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_worker_pool_size_fits_the_budget():
+    """Test the pools of the workers, plus a reload, fit the budget."""
+    for workers in (1, 2, 4, 8, 16, 32):
+        pool_size = worker_pool_size(80, workers, cap=100)
+        # A pool and a listener per worker, and an extra worker on reload
+        assert (workers + 1) * (pool_size + 1) <= 80
+
+    assert worker_pool_size(80, 1, cap=20) == 20
+    assert worker_pool_size(80, 200, cap=20) == 1
+
+
+def test_supervisor_respawns_exited_workers():
+    """Test a recycled worker is replaced."""
+    supervisor = Supervisor(2, target=_exit_at_once, stop_timeout=5)
+    supervisor.start()
+    try:
+        first = [worker.process for worker in supervisor.workers]
+        for process in first:
+            process.join(10)
+
+        supervisor.respawn_exited()
+
+        assert len(supervisor.workers) == 2
+        respawned = [worker.process for worker in supervisor.workers]
+        assert not set(respawned) & set(first)
+    finally:
+        supervisor.stop()
+
+
+def test_supervisor_reload_replaces_every_worker():
+    """Test a reload starts new workers and stops the old ones."""
+    supervisor = Supervisor(2, target=_serve, stop_timeout=5)
+    supervisor.start()
+    try:
+        old = [worker.process for worker in supervisor.workers]
+
+        supervisor.reload()
+
+        assert all(not process.is_alive() for process in old)
+        assert all(
+            worker.process.is_alive() and worker.process not in old
+            for worker in supervisor.workers
+        )
+    finally:
+        supervisor.stop()
+
+    assert supervisor.workers == []
+
+
+def test_server_serves_over_workers(test_engine, prepare_database):
+    """Test the launcher serves the app and shuts down on SIGTERM."""
+    port = _free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": test_engine.url.render_as_string(hide_password=False),
+        "SERVER_HOST": "127.0.0.1",
+        "SERVER_PORT": str(port),
+        "WEB_CONCURRENCY": "2",
+    }
+    server = subprocess.Popen([sys.executable, "-m", "app.server"], env=env)
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/healthcheck")
+                break
+            except httpx.TransportError:
+                assert time.monotonic() < deadline, "Server did not start"
+                time.sleep(0.2)
+
+        assert response.json() == {"status": "OK"}
+    finally:
+        server.send_signal(signal.SIGTERM)
+        assert server.wait(30) == 0
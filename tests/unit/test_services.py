@@ -1,16 +1,14 @@
 """Unit tests for the events service."""
 
 from datetime import date, datetime, time, timezone
-from uuid import UUID
 
 import pytest
 from fastapi import HTTPException
-from sqlalchemy import text
 
-from app.models.event import Event
-from app.schemas.event import SearchErrorResponse, SearchSuccessResponse
 from app.services.events_service import EventService
 
+from app.schemas.event import FacetsSuccessResponse, SearchErrorResponse, SearchSuccessResponse  # isort: skip  # fmt: skip # noqa: E501
+
 
 @pytest.mark.asyncio
 async def test_ensure_utc_timezone():
@@ -50,56 +48,33 @@ async def test_validate_date_range():
 
 
 @pytest.mark.asyncio(scope="function")
-async def test_search_events(async_session, prepare_database):
+async def test_search_events(repository):
     """Test search_events method."""
 
     service = EventService()
 
-    # Create test event
-    test_event = Event(
-        id=UUID("a7a9d2f8-e3d3-4b2a-b8c9-f1d4e6a7b8c9"),
-        provider_unique_id="test_1234",
-        provider_base_event_id="base_123",
-        provider_event_id="event_123",
-        title="Test Event",
-        start_date=date(2023, 1, 15),
-        start_time=time(12, 0),
-        end_date=date(2023, 1, 15),
-        end_time=time(14, 0),
-        min_price=10.0,
-        max_price=20.0,
-    )
-
-    await async_session.execute(
-        text("DELETE FROM events WHERE id = :id"), {"id": test_event.id}
-    )
-    await async_session.execute(
-        text(
-            "INSERT INTO events VALUES (:id, :provider_unique_id, :provider_base_event_id, "  # noqa: E501
-            ":provider_event_id, :title, :start_date, :start_time, :end_date, :end_time, "  # noqa: E501
-            ":min_price, :max_price)"
-        ),
-        {
-            "id": test_event.id,
-            "provider_unique_id": test_event.provider_unique_id,
-            "provider_base_event_id": test_event.provider_base_event_id,
-            "provider_event_id": test_event.provider_event_id,
-            "title": test_event.title,
-            "start_date": test_event.start_date,
-            "start_time": test_event.start_time,
-            "end_date": test_event.end_date,
-            "end_time": test_event.end_time,
-            "min_price": test_event.min_price,
-            "max_price": test_event.max_price,
-        },
+    await repository.upsert(
+        [
+            {
+                "provider_unique_id": "test_1234",
+                "provider_base_event_id": "base_123",
+                "provider_event_id": "event_123",
+                "title": "Test Event",
+                "start_date": date(2023, 1, 15),
+                "start_time": time(12, 0),
+                "end_date": date(2023, 1, 15),
+                "end_time": time(14, 0),
+                "min_price": 10.0,
+                "max_price": 20.0,
+            }
+        ]
     )
-    await async_session.commit()
 
     # Search within date range containing the event
     starts_at = datetime(2023, 1, 1, tzinfo=timezone.utc)
     ends_at = datetime(2023, 1, 31, tzinfo=timezone.utc)
 
-    response = await service.search_events(async_session, starts_at, ends_at)
+    response = await service.search_events(repository, starts_at, ends_at)
 
     assert isinstance(response, SearchSuccessResponse)
     assert response.data is not None
@@ -110,7 +85,7 @@ async def test_search_events(async_session, prepare_database):
 
 
 @pytest.mark.asyncio(scope="function")
-async def test_search_events_no_results(async_session, prepare_database):
+async def test_search_events_no_results(repository):
     """Test search_events method with no matching results."""
 
     service = EventService()
@@ -119,7 +94,7 @@ async def test_search_events_no_results(async_session, prepare_database):
     starts_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
     ends_at = datetime(2024, 1, 31, tzinfo=timezone.utc)
 
-    response = await service.search_events(async_session, starts_at, ends_at)
+    response = await service.search_events(repository, starts_at, ends_at)
 
     assert isinstance(response, SearchErrorResponse)
     assert response.error is not None
@@ -128,7 +103,7 @@ async def test_search_events_no_results(async_session, prepare_database):
 
 
 @pytest.mark.asyncio(scope="function")
-async def test_search_events_invalid_dates(async_session):
+async def test_search_events_invalid_dates(memory_repository):
     """Test search_events method with invalid date range."""
 
     service = EventService()
@@ -137,7 +112,228 @@ async def test_search_events_invalid_dates(async_session):
     ends_at = datetime(2023, 1, 1, tzinfo=timezone.utc)
 
     with pytest.raises(HTTPException) as exc:
-        await service.search_events(async_session, starts_at, ends_at)
+        await service.search_events(memory_repository, starts_at, ends_at)
 
     assert exc.value.status_code == 400
     assert exc.value.detail == "starts_at must be before ends_at"
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_get_day_facets(repository):
+    """Test get_day_facets reads the summaries refreshed on upsert."""
+
+    service = EventService()
+
+    events = [
+        {
+            "provider_unique_id": f"facet_{i}",
+            "provider_base_event_id": "facet",
+            "provider_event_id": str(i),
+            "title": "Facet Event",
+            "start_date": date(2022, 3, day),
+            "start_time": time(12, 0),
+            "end_date": date(2022, 3, day),
+            "end_time": time(14, 0),
+            "min_price": min_price,
+            "max_price": max_price,
+        }
+        for i, (day, min_price, max_price) in enumerate(
+            [(1, 10.0, 20.0), (1, 5.0, 15.0), (3, 30.0, 40.0)]
+        )
+    ]
+    await repository.upsert(events)
+
+    starts_at = datetime(2022, 3, 1, tzinfo=timezone.utc)
+    ends_at = datetime(2022, 3, 31, tzinfo=timezone.utc)
+
+    response = await service.get_day_facets(repository, starts_at, ends_at)
+
+    assert isinstance(response, FacetsSuccessResponse)
+    assert response.data is not None
+    assert [facet.day for facet in response.data.days] == [
+        date(2022, 3, 1),
+        date(2022, 3, 3),
+    ]
+    first_day = response.data.days[0]
+    assert first_day.event_count == 2
+    assert first_day.min_price == 5.0
+    assert first_day.max_price == 20.0
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_get_day_facets_of_a_moved_event(repository):
+    """Test an event moved to another day no longer counts on the old one."""
+    event = {
+        "provider_unique_id": "moved_1",
+        "provider_base_event_id": "moved",
+        "provider_event_id": "1",
+        "title": "Moved Event",
+        "start_date": date(2022, 1, 1),
+        "start_time": time(12, 0),
+        "end_date": date(2022, 1, 1),
+        "end_time": time(14, 0),
+        "min_price": 10.0,
+        "max_price": 20.0,
+    }
+    await repository.upsert([event])
+    moved_on = date(2022, 1, 5)
+    await repository.upsert([{**event, "start_date": moved_on}])
+
+    days = await repository.day_summaries(date(2022, 1, 1), date(2022, 1, 31))
+
+    assert [(day.day, day.event_count) for day in days] == [(moved_on, 1)]
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_get_day_facets_no_results(repository):
+    """Test get_day_facets method with no matching results."""
+
+    service = EventService()
+
+    starts_at = datetime(2025, 2, 1, tzinfo=timezone.utc)
+    ends_at = datetime(2025, 2, 28, tzinfo=timezone.utc)
+
+    response = await service.get_day_facets(repository, starts_at, ends_at)
+
+    assert isinstance(response, SearchErrorResponse)
+    assert response.error.code == "404"
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_search_events_by_price(repository):
+    """Test search_events filtering and ordering by price."""
+
+    service = EventService()
+
+    events = [
+        {
+            "provider_unique_id": f"price_{i}",
+            "provider_base_event_id": "price",
+            "provider_event_id": str(i),
+            "title": f"Price Event {i}",
+            "start_date": date(2022, 5, 10 + i),
+            "start_time": time(12, 0),
+            "end_date": date(2022, 5, 10 + i),
+            "end_time": time(14, 0),
+            "min_price": min_price,
+            "max_price": max_price,
+        }
+        for i, (min_price, max_price) in enumerate(
+            [(40.0, 60.0), (5.0, 15.0), (20.0, 30.0)]
+        )
+    ]
+    await repository.upsert(events)
+
+    starts_at = datetime(2022, 5, 1, tzinfo=timezone.utc)
+    ends_at = datetime(2022, 5, 31, tzinfo=timezone.utc)
+
+    response = await service.search_events(
+        repository, starts_at, ends_at, 10.0, 35.0, "price"
+    )
+
+    assert isinstance(response, SearchSuccessResponse)
+    assert [event.title for event in response.data.events] == [
+        "Price Event 1",
+        "Price Event 2",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_validate_price_range():
+    """Test _validate_price_range method."""
+
+    service = EventService()
+
+    service._validate_price_range(None, 10.0)
+    service._validate_price_range(10.0, 10.0)
+
+    with pytest.raises(HTTPException) as exc:
+        service._validate_price_range(20.0, 10.0)
+    assert exc.value.status_code == 400
+    assert exc.value.detail == "min_price must not exceed max_price"
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_search_events_by_title(repository):
+    """Test search_events prefix text search on titles."""
+
+    service = EventService()
+
+    titles = ["Rock Concert", "Jazz Concert", "Rock Climbing"]
+    events = [
+        {
+            "provider_unique_id": f"title_{i}",
+            "provider_base_event_id": "title",
+            "provider_event_id": str(i),
+            "title": title,
+            "start_date": date(2022, 7, 10),
+            "start_time": time(12, 0),
+            "end_date": date(2022, 7, 10),
+            "end_time": time(14, 0),
+            "min_price": 10.0,
+            "max_price": 20.0,
+        }
+        for i, title in enumerate(titles)
+    ]
+    await repository.upsert(events)
+
+    starts_at = datetime(2022, 7, 1, tzinfo=timezone.utc)
+    ends_at = datetime(2022, 7, 31, tzinfo=timezone.utc)
+
+    response = await service.search_events(
+        repository, starts_at, ends_at, None, None, None, "rock conc"
+    )
+
+    assert isinstance(response, SearchSuccessResponse)
+    assert [event.title for event in response.data.events] == ["Rock Concert"]
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_search_events_include_offline(repository):
+    """Test events dropped from the feed are only found on request."""
+
+    service = EventService()
+
+    events = [
+        {
+            "provider_unique_id": f"offline_{i}",
+            "provider_base_event_id": "offline",
+            "provider_event_id": str(i),
+            "title": f"Offline Event {i}",
+            "start_date": date(2022, 8, 10),
+            "start_time": time(12, 0),
+            "end_date": date(2022, 8, 10),
+            "end_time": time(14, 0),
+            "min_price": 10.0,
+            "max_price": 20.0,
+        }
+        for i in range(2)
+    ]
+    await repository.upsert(events, generation=1)
+    # The next ingest run no longer sees the second event
+    await repository.upsert(events[:1], generation=2)
+    await repository.sweep(2)
+
+    starts_at = datetime(2022, 8, 1, tzinfo=timezone.utc)
+    ends_at = datetime(2022, 8, 31, tzinfo=timezone.utc)
+
+    online = await service.search_events(repository, starts_at, ends_at)
+    everything = await service.search_events(
+        repository, starts_at, ends_at, include_offline=True
+    )
+
+    assert [event.title for event in online.data.events] == ["Offline Event 0"]
+    assert len(everything.data.events) == 2
+
+
+@pytest.mark.asyncio
+async def test_text_words():
+    """Test _text_words method."""
+
+    service = EventService()
+
+    assert service._text_words("Rock  conc!") == ("rock", "conc")
+
+    with pytest.raises(HTTPException) as exc:
+        service._text_words("!?")
+    assert exc.value.status_code == 400
@@ -0,0 +1,29 @@
+"""Unit tests for the database session helpers."""
+
+from datetime import date
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.session import warm_up
+from app.repositories.base import EventQuery
+from app.repositories.postgres import build_search_statement
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_warm_up_fills_the_pool(test_engine, prepare_database):
+    """Test the warm-up fills the pool with connections ready to search."""
+    engine = create_async_engine(test_engine.url, pool_size=3)
+    today = date.today()
+    statement = build_search_statement(EventQuery(today, today))
+    try:
+        await warm_up(engine, statement)
+
+        assert engine.pool.checkedin() == 3
+        async with engine.connect() as conn:
+            raw = await conn.get_raw_connection()
+            # The search was prepared on the connection before any request
+            prepared = raw.dbapi_connection._prepared_statement_cache
+            assert any("FROM events" in sql for sql in prepared)
+    finally:
+        await engine.dispose()
@@ -1,12 +1,24 @@
 """Unit tests for the fetch events task."""
 
+import asyncio
+import multiprocessing
+from datetime import date, time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from app.tasks.fetch_events import _fetch_events, parse_xml, upsert_events
+from app.core.config import get_settings
+from app.models.event import OFFLINE, ONLINE, Event, EventDaySummary
+from app.models.ingest_run import IngestRun
+from app.repositories.base import deduplicate_events
+from app.repositories.postgres import PostgresEventRepository
+from app.tasks import ingest_runs
+from app.tasks.batching import AdaptiveBatcher
+from app.tasks.feed_parser import parse_feed, parse_xml, split_feed
+from app.tasks.fetch_events import _fetch_events
 
 
 @pytest.mark.asyncio
@@ -31,9 +43,166 @@ async def test_parse_xml():
     assert event["title"] == "Test Event"
 
 
+def _build_feed(base_events: int) -> bytes:
+    """Build a feed with two events per online base_event."""
+    elements = []
+    for i in range(base_events):
+        sell_mode = "offline" if i % 5 == 0 else "online"
+        elements.append(
+            f'<base_event base_event_id="{i}" title="Event {i}" sell_mode="{sell_mode}">'  # noqa: E501
+            f'<event event_id="1" event_start_date="2024-10-28T12:00:00" event_end_date="2024-10-28T14:00:00"><zone price="{i}.0" /></event>'  # noqa: E501
+            f'<event event_id="2" event_start_date="2024-10-29T12:00:00" event_end_date="2024-10-29T14:00:00"><zone price="{i}.5" /></event>'  # noqa: E501
+            "</base_event>"
+        )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<planList><output>{"".join(elements)}</output></planList>'
+    ).encode()
+
+
+def test_split_feed():
+    """Test split_feed keeps whole base_events in standalone documents."""
+    xml_content = _build_feed(10)
+
+    chunks = split_feed(xml_content, len(xml_content) // 3)
+
+    assert len(chunks) > 1
+    assert all(chunk.startswith(b'<?xml version="1.0"') for chunk in chunks)
+    assert [e for c in chunks for e in parse_xml(c)] == parse_xml(xml_content)
+
+
+@pytest.mark.asyncio
+async def test_parse_feed_in_parallel():
+    """Test parse_feed merges the chunks parsed by the pool in feed order."""
+    xml_content = _build_feed(40)
+
+    with patch.object(get_settings(), "PARSE_PARALLEL_THRESHOLD_BYTES", 0):
+        with patch.object(get_settings(), "PARSE_WORKERS", 2):
+            events = await parse_feed(xml_content)
+
+    assert len(events) == 64
+    assert events == parse_xml(xml_content)
+
+
+def _parse_feed_in_process(xml_content: bytes, queue) -> None:
+    queue.put(asyncio.run(parse_feed(xml_content)))
+
+
+def test_parse_feed_in_a_daemon_process():
+    """Test parse_feed runs its pool in a daemonic (Celery) worker."""
+    xml_content = _build_feed(40)
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+
+    with patch.object(get_settings(), "PARSE_PARALLEL_THRESHOLD_BYTES", 0):
+        with patch.object(get_settings(), "PARSE_WORKERS", 2):
+            process = context.Process(
+                target=_parse_feed_in_process,
+                args=(xml_content, queue),
+                daemon=True,
+            )
+            process.start()
+    events = queue.get(timeout=60)
+    process.join()
+
+    assert events == parse_xml(xml_content)
+
+
+@pytest.mark.asyncio
+async def test_parse_feed_malformed_chunk():
+    """Test parse_feed yields no events when a base_event is malformed."""
+    xml_content = _build_feed(8).replace(b'title="Event 3"', b'title="<"')
+
+    with patch.object(get_settings(), "PARSE_PARALLEL_THRESHOLD_BYTES", 0):
+        with patch.object(get_settings(), "PARSE_WORKERS", 2):
+            events = await parse_feed(xml_content)
+
+    assert events == []
+
+
+def test_deduplicate_events():
+    """Test deduplicate_events keeps the last event of each id."""
+    events = [
+        {"provider_unique_id": "1_1", "title": "First"},
+        {"provider_unique_id": "1_2", "title": "Other"},
+        {"provider_unique_id": "1_1", "title": "Last"},
+    ]
+
+    assert deduplicate_events(events) == [
+        {"provider_unique_id": "1_1", "title": "Last"},
+        {"provider_unique_id": "1_2", "title": "Other"},
+    ]
+
+
+def test_adaptive_batcher_adapts_to_latency():
+    """Test AdaptiveBatcher scales the size towards the target latency."""
+    events = [{"provider_unique_id": str(i)} for i in range(10_000)]
+    batcher = AdaptiveBatcher(
+        initial_size=100, min_size=10, max_size=1000, target_seconds=0.1
+    )
+
+    batches = batcher.batches(events)
+    offset, batch = next(batches)
+    assert (offset, len(batch)) == (100, 100)
+
+    # Fast statements grow the batches, at most 2x at a time
+    batcher.record(len(batch), 0.01)
+    offset, batch = next(batches)
+    assert (offset, len(batch)) == (300, 200)
+
+    # Slow statements shrink them, down to the minimum size
+    for _ in range(10):
+        batcher.record(batcher.size, 10.0)
+    assert batcher.size == 10
+
+    # Short tail batches do not count
+    batcher.record(5, 10.0)
+    assert batcher.size == 10
+
+
 @pytest.mark.asyncio(scope="function")
-async def test_upsert_events(async_session: AsyncSession):
-    """Test upsert_events function."""
+async def test_adaptive_batcher_respects_bind_parameter_limit(
+    session_maker, prepare_database
+):
+    """Test the batches of a large feed upsert within the parameter limit."""
+    event = {
+        "provider_base_event_id": "batch",
+        "title": "Batched event",
+        "start_date": date(2018, 4, 1),
+        "start_time": time(12, 0),
+        "end_date": date(2018, 4, 1),
+        "end_time": time(14, 0),
+        "min_price": 20.0,
+        "max_price": 50.0,
+    }
+    events = [
+        {**event, "provider_unique_id": f"batch_{i}", "provider_event_id": i}
+        for i in map(str, range(4000))
+    ]
+    batcher = AdaptiveBatcher(
+        initial_size=10_000,
+        max_size=10_000,
+        row_parameters=PostgresEventRepository.row_parameters,
+    )
+
+    async with session_maker() as session:
+        repository = PostgresEventRepository(session)
+        sizes = []
+        for _, batch in batcher.batches(events):
+            await repository.upsert(batch)
+            sizes.append(len(batch))
+
+        count = await session.scalar(
+            select(func.count()).where(Event.provider_base_event_id == "batch")
+        )
+
+    assert len(sizes) > 1  # Capped below the requested size
+    assert count == len(events)
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_postgres_upsert(async_session: AsyncSession):
+    """Test PostgresEventRepository.upsert statements and commit."""
     sample_events = [
         {
             "provider_unique_id": "1_101",
@@ -54,10 +223,15 @@ async def test_upsert_events(async_session: AsyncSession):
     ) as mock_execute:  # noqa: E501
         with patch.object(
             async_session, "commit", new_callable=AsyncMock
-        ) as mock_commit:
-            await upsert_events(sample_events, async_session)
+        ) as mock_commit, patch.object(
+            async_session, "scalars", new_callable=AsyncMock, return_value=[]
+        ) as mock_scalars:
+            repository = PostgresEventRepository(async_session)
+            await repository.upsert(sample_events)
 
-            mock_execute.assert_called_once()
+            # Previous days of the events, upsert and refresh of the days
+            mock_scalars.assert_called_once()
+            assert mock_execute.call_count == 3
             mock_commit.assert_called_once()
 
 
@@ -75,24 +249,72 @@ async def test_fetch_events_success():
     </root>
     """  # noqa: E501
 
-    mock_response = MagicMock()
-    mock_response.content = mock_xml
-    mock_response.raise_for_status = MagicMock()
-
     mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.scalar.return_value = 1  # Dataset version
     mock_session_maker = MagicMock(spec=async_sessionmaker)
     mock_session_maker.return_value.__aenter__.return_value = mock_session
 
-    mock_client = AsyncMock(spec=httpx.AsyncClient)
-    mock_client.__aenter__.return_value.get.return_value = mock_response
+    mock_download = AsyncMock(return_value=mock_xml)
+    mock_sweep = AsyncMock(return_value=[])
 
-    with patch("httpx.AsyncClient", return_value=mock_client):
-        await _fetch_events(mock_session_maker)
+    with patch("app.tasks.fetch_events.download_feed", mock_download):
+        with patch.object(PostgresEventRepository, "sweep", mock_sweep):
+            await _fetch_events(mock_session_maker)
 
     # Verify the session was used correctly
     mock_session_maker.assert_called_once()
     # Verify HTTP request was made
-    mock_client.__aenter__.return_value.get.assert_called_once()
+    mock_download.assert_called_once()
+    # The events of the feed are swept with the generation of the run
+    mock_sweep.assert_called_once_with(1)
+
+
+@pytest.mark.asyncio
+async def test_fetch_events_analyzes_after_a_large_run():
+    """Test the planner statistics are refreshed after a large run."""
+    mock_xml = b"""
+    <root>
+        <base_event base_event_id="1" title="Test Event" sell_mode="online">
+            <event event_id="001" event_start_date="2024-10-28T12:00:00" event_end_date="2024-10-28T14:00:00" />
+        </base_event>
+    </root>
+    """  # noqa: E501
+
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session.scalar.return_value = 1
+    mock_session_maker = MagicMock(spec=async_sessionmaker)
+    mock_session_maker.return_value.__aenter__.return_value = mock_session
+    mock_analyze = AsyncMock()
+
+    with (
+        patch("app.tasks.fetch_events.download_feed", return_value=mock_xml),
+        patch("app.tasks.fetch_events.analyze_events", mock_analyze),
+        patch.object(PostgresEventRepository, "sweep", return_value=[]),
+    ):
+        with patch.object(get_settings(), "INGEST_ANALYZE_THRESHOLD", 2):
+            await _fetch_events(mock_session_maker)
+        mock_analyze.assert_not_called()
+
+        with patch.object(get_settings(), "INGEST_ANALYZE_THRESHOLD", 1):
+            await _fetch_events(mock_session_maker)
+        mock_analyze.assert_called_once_with(mock_session)
+
+
+@pytest.mark.asyncio
+async def test_fetch_events_malformed_feed_sweeps_nothing():
+    """Test a feed without events does not take every event offline."""
+    mock_session = AsyncMock(spec=AsyncSession)
+    mock_session_maker = MagicMock(spec=async_sessionmaker)
+    mock_session_maker.return_value.__aenter__.return_value = mock_session
+
+    mock_download = AsyncMock(return_value=b"<root><base_event")
+    mock_sweep = AsyncMock()
+
+    with patch("app.tasks.fetch_events.download_feed", mock_download):
+        with patch.object(PostgresEventRepository, "sweep", mock_sweep):
+            await _fetch_events(mock_session_maker)
+
+    mock_sweep.assert_not_called()
 
 
 @pytest.mark.asyncio
@@ -102,14 +324,200 @@ async def test_fetch_events_http_error():
     mock_session = AsyncMock(spec=AsyncSession)
     mock_session_maker.return_value.__aenter__.return_value = mock_session
 
-    mock_client = AsyncMock(spec=httpx.AsyncClient)
-    mock_client.__aenter__.return_value.get.side_effect = httpx.RequestError(
-        "Test error"
-    )
+    mock_download = AsyncMock(side_effect=httpx.RequestError("Test error"))
 
-    with patch("httpx.AsyncClient", return_value=mock_client):
+    with patch("app.tasks.fetch_events.download_feed", mock_download):
         with pytest.raises(httpx.RequestError):
             await _fetch_events(mock_session_maker)
 
     # Verify the session was created
     mock_session_maker.assert_called_once()
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_fetch_events_resumes_from_checkpoint(
+    session_maker, prepare_database, tmp_path
+):
+    """Test a retried run resumes from its checkpoint on its cached payload."""
+    xml_content = _build_feed(4)
+    events = parse_xml(xml_content)
+
+    mock_upsert = AsyncMock()
+    mock_download = AsyncMock()
+
+    with patch.object(get_settings(), "INGEST_SPOOL_DIR", str(tmp_path)):
+        # A previous attempt downloaded the feed and committed 2 events
+        ingest_runs.store_payload("run-1", xml_content)
+        async with session_maker() as session:
+            digest = ingest_runs.payload_digest(xml_content)
+            await ingest_runs.start_run(session, "run-1", digest)
+            await ingest_runs.save_checkpoint(session, "run-1", 2)
+
+        # And another one broke off while downloading
+        ingest_runs.part_path("run-0").write_bytes(b"<root>")
+
+        with patch("app.tasks.fetch_events.download_feed", mock_download):
+            with patch.object(PostgresEventRepository, "upsert", mock_upsert):
+                await _fetch_events(session_maker, "run-1")
+
+        assert ingest_runs.load_payload("run-1") is None
+        assert list(tmp_path.iterdir()) == []
+
+    mock_download.assert_not_called()
+    mock_upsert.assert_called_once()
+    assert mock_upsert.call_args.args[0] == events[2:]
+
+    async with session_maker() as session:
+        result = await session.execute(select(IngestRun))
+        assert result.scalars().all() == []
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_fetch_events_restarts_on_another_payload(
+    session_maker, prepare_database, tmp_path
+):
+    """Test a retry that downloads the feed again does not resume."""
+    xml_content = _build_feed(4)
+
+    mock_upsert = AsyncMock()
+    mock_download = AsyncMock(return_value=xml_content)
+
+    with patch.object(get_settings(), "INGEST_SPOOL_DIR", str(tmp_path)):
+        # A previous attempt committed 2 events, its payload is gone
+        async with session_maker() as session:
+            run = await ingest_runs.start_run(session, "run-1", "digest")
+            await ingest_runs.save_checkpoint(session, "run-1", 2)
+
+        with patch("app.tasks.fetch_events.download_feed", mock_download):
+            with patch.object(PostgresEventRepository, "upsert", mock_upsert):
+                await _fetch_events(session_maker, "run-1")
+
+    mock_download.assert_called_once()
+    mock_upsert.assert_called_once()
+    batch, generation = mock_upsert.call_args.args
+    assert batch == parse_xml(xml_content)
+    # Events upserted from the previous payload only are swept
+    assert generation > run[1]
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_ingest_lock(test_engine):
+    """Test only one ingest run can hold the lock at a time."""
+    async with ingest_runs.ingest_lock(test_engine) as acquired:
+        assert acquired
+        async with ingest_runs.ingest_lock(test_engine) as acquired_again:
+            assert not acquired_again
+
+    async with ingest_runs.ingest_lock(test_engine) as acquired:
+        assert acquired
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_postgres_upsert_duplicates(session_maker, prepare_database):
+    """Test PostgresEventRepository.upsert accepts a repeated event."""
+    event = {
+        "provider_unique_id": "dup_1",
+        "provider_base_event_id": "dup",
+        "provider_event_id": "1",
+        "title": "First title",
+        "start_date": date(2024, 10, 28),
+        "start_time": time(12, 0),
+        "end_date": date(2024, 10, 28),
+        "end_time": time(14, 0),
+        "min_price": 20.0,
+        "max_price": 50.0,
+    }
+
+    duplicate = {**event, "title": "Last title"}
+
+    async with session_maker() as session:
+        await PostgresEventRepository(session).upsert([event, duplicate])
+
+        result = await session.execute(
+            select(Event.title).where(Event.provider_unique_id == "dup_1")
+        )
+        assert result.scalars().all() == ["Last title"]
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_upsert_fits_the_row_limit(session_maker, prepare_database):
+    """Test a batch of the row limit fits in a single upsert statement."""
+    event = {
+        "provider_unique_id": "limit",
+        "provider_base_event_id": "limit",
+        "provider_event_id": "0",
+        "title": "Limit event",
+        "start_date": date(2018, 3, 1),
+        "start_time": time(12, 0),
+        "end_date": date(2018, 3, 1),
+        "end_time": time(14, 0),
+        "min_price": 20.0,
+        "max_price": 50.0,
+    }
+    row_parameters = PostgresEventRepository.row_parameters
+    rows = AdaptiveBatcher(row_parameters=row_parameters).row_limit(event)
+    events = [
+        {**event, "provider_unique_id": f"limit_{i}", "title": f"Event {i}"}
+        for i in range(rows)
+    ]
+
+    async with session_maker() as session:
+        await PostgresEventRepository(session).upsert(events)
+
+        count = await session.scalar(
+            select(func.count()).where(Event.provider_base_event_id == "limit")
+        )
+        assert count == rows
+
+
+@pytest.mark.asyncio(scope="function")
+async def test_sweep_events(session_maker, prepare_database):
+    """Test events missing from a run are taken offline, with their days."""
+    events = [
+        {
+            "provider_unique_id": f"sweep_{day}",
+            "provider_base_event_id": "sweep",
+            "provider_event_id": str(day),
+            "title": "Swept event",
+            "start_date": date(2019, 5, day),
+            "start_time": time(12, 0),
+            "end_date": date(2019, 5, day),
+            "end_time": time(14, 0),
+            "min_price": 20.0,
+            "max_price": 50.0,
+        }
+        for day in (1, 1, 2)
+    ]
+    events[1]["provider_unique_id"] = "sweep_1b"
+    statuses = select(Event.provider_unique_id, Event.status).where(
+        Event.provider_base_event_id == "sweep"
+    )
+    summaries = select(EventDaySummary.day, EventDaySummary.event_count).where(
+        EventDaySummary.day.between(date(2019, 5, 1), date(2019, 5, 2))
+    )
+
+    async with session_maker() as session:
+        repository = PostgresEventRepository(session)
+        generation = await ingest_runs.next_generation(session)
+        await repository.upsert(events, generation)
+        # The next run no longer sees the second event of day 1 nor day 2
+        generation = await ingest_runs.next_generation(session)
+        await repository.upsert(events[:1], generation)
+
+        swept = await repository.sweep(generation)
+
+        assert date(2019, 5, 2) in {event["start_date"] for event in swept}
+        result = await session.execute(statuses)
+        assert dict(result.all()) == {
+            "sweep_1": ONLINE,
+            "sweep_1b": OFFLINE,
+            "sweep_2": OFFLINE,
+        }
+        result = await session.execute(summaries)
+        assert result.all() == [(date(2019, 5, 1), 1)]
+
+        # Back in the feed, the event is online again
+        generation = await ingest_runs.next_generation(session)
+        await repository.upsert(events, generation)
+        result = await session.execute(statuses)
+        assert set(dict(result.all()).values()) == {ONLINE}